@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Post, Category, Location
+from .models import Post, Category, Location, Comment
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -23,6 +23,8 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'is_published',
         'created_at',
+        'comment_count',
+        'image_status',
     )
     list_editable = (
         'is_published',
@@ -30,10 +32,22 @@ class PostAdmin(admin.ModelAdmin):
         'text'
     )
     search_fields = ('title',)
-    list_filter = ('is_published',)
+    list_filter = ('is_published', 'image_status')
     list_display_links = ('title',)
     #filter_horizontal = ('.,..',)
 
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = (
+        'text',
+        'post',
+        'author',
+        'created_at',
+    )
+    list_select_related = ('post', 'author')
+    # Удаление через админку (и массовое тоже) отправляет post_delete,
+    # поэтому счётчик комментариев у поста остаётся верным.
+
 # Регистрируем класс с настройками админки для моделей IceCream и Category:
 admin.site.register(Post, PostAdmin)
 admin.site.register(Category, CategoryAdmin)
@@ -41,3 +55,4 @@ admin.site.register(Category, CategoryAdmin)
 # чтобы ими можно было управлять через админку
 # (интерфейс админки для этих моделей останется стандартным):
 admin.site.register(Location)
+admin.site.register(Comment, CommentAdmin)
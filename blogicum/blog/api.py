@@ -0,0 +1,224 @@
+"""JSON API только для чтения (для мобильного клиента).
+
+Данные выбираются через values(): модели не создаются, а колонки,
+не попавшие в `fields=`, не читаются из базы.
+"""
+import hashlib
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views import View
+
+from .models import Category, Comment, Post
+from .pagination import InvalidCursor, KeysetPaginator
+from .storage import image_storage
+
+User = get_user_model()
+
+# Поле ответа -> колонки, которые для него нужно выбрать
+POST_FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'text': ('text',),
+    'pub_date': ('pub_date',),
+    'updated_at': ('updated_at',),
+    'author': ('author__username',),
+    'category': ('category__slug',),
+    'category_title': ('category__title',),
+    'location': ('location__name', 'location__is_published'),
+    'comment_count': ('comment_count',),
+    'image': ('image',),
+    'url': ('id',),
+}
+LIST_FIELDS = tuple(field for field in POST_FIELDS if field != 'text')
+COMMENT_COLUMNS = ('id', 'text', 'created_at', 'author__username')
+
+
+class ApiError(Exception):
+    pass
+
+
+def parse_fields(request, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in raw.split(',') if field.strip()
+    ))
+    unknown = set(fields) - set(POST_FIELDS)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def post_values(queryset, fields, keys=('pub_date', 'id')):
+    """values()-выборка только нужных колонок (и ключей пагинации)."""
+    columns = dict.fromkeys(keys)
+    for field in fields:
+        columns.update(dict.fromkeys(POST_FIELDS[field]))
+    return queryset.values(*columns)
+
+
+def serialize_post(row, fields):
+    data = {}
+    for field in fields:
+        if field == 'url':
+            data[field] = reverse('blog:post_detail', args=[row['id']])
+        elif field == 'image':
+            data[field] = row['image'] and image_storage.url(row['image'])
+        elif field == 'location':
+            # Неопубликованное место не показывается, как и в шаблонах
+            data[field] = (
+                row['location__name'] if row['location__is_published']
+                else None
+            )
+        else:
+            data[field] = row[POST_FIELDS[field][0]]
+    return data
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created_at': row['created_at'],
+        'author': row['author__username'],
+    }
+
+
+def visible_posts(user):
+    """Как в ленте, но автор видит и свои неопубликованные посты."""
+    visible = Q(pk__in=Post.objects.published().values('pk'))
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return Post.objects.filter(visible)
+
+
+class JsonApiView(View):
+    """Отдаёт JSON с ETag по содержимому ответа.
+
+    Отвечает 304, если клиент уже получил ту же версию.
+    """
+
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, *args, **kwargs):
+        try:
+            data = self.get_data(request, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Некорректный курсор.'}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Не найдено.'}, status=404)
+        body = json.dumps(
+            data, cls=DjangoJSONEncoder, ensure_ascii=False,
+            separators=(',', ':'),
+        ).encode()
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        # Состав лент зависит от того, кто смотрит
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def get_data(self, request, **kwargs):
+        """Данные ответа; по умолчанию — пустой объект."""
+        return {}
+
+
+class PostListApiView(JsonApiView):
+    per_page = 20
+
+    def get_queryset(self):
+        return Post.objects.published()
+
+    def get_data(self, request, **kwargs):
+        fields = parse_fields(request, LIST_FIELDS)
+        paginator = KeysetPaginator(
+            post_values(self.get_queryset(), fields), self.per_page,
+        )
+        page = paginator.page(request.GET.get('cursor'))
+        return {
+            'results': [serialize_post(row, fields) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+
+
+class CategoryPostsApiView(PostListApiView):
+
+    def get_queryset(self):
+        category = get_object_or_404(
+            Category, slug=self.kwargs['category_slug'], is_published=True,
+        )
+        return category.posts.published()
+
+
+class AuthorPostsApiView(PostListApiView):
+
+    def get_queryset(self):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        queryset = Post.objects.filter(author=author)
+        # Автор видит и свои неопубликованные посты, как в профиле
+        if self.request.user != author:
+            queryset = queryset.published()
+        return queryset
+
+
+class CommentListApiView(JsonApiView):
+    per_page = 20
+
+    def get_comments_page(self, post_id, cursor=None):
+        paginator = KeysetPaginator(
+            Comment.objects.filter(post_id=post_id).values(*COMMENT_COLUMNS),
+            self.per_page, keys=('created_at', 'id'),
+        )
+        return paginator.page(cursor)
+
+    def get_post_row(self, fields):
+        row = post_values(
+            visible_posts(self.request.user).filter(pk=self.kwargs['post_id']),
+            fields,
+        ).first()
+        if row is None:
+            raise Http404('Пост не найден.')
+        return row
+
+    def get_data(self, request, **kwargs):
+        self.get_post_row(('id',))
+        page = self.get_comments_page(
+            kwargs['post_id'], request.GET.get('cursor'),
+        )
+        return {
+            'results': [serialize_comment(row) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+
+
+class PostDetailApiView(CommentListApiView):
+    """Пост с первой страницей комментариев.
+
+    Следующие страницы отдаёт CommentListApiView.
+    """
+
+    def get_data(self, request, **kwargs):
+        fields = parse_fields(request, tuple(POST_FIELDS))
+        row = self.get_post_row(fields)
+        page = self.get_comments_page(kwargs['post_id'])
+        data = serialize_post(row, fields)
+        data['comments'] = {
+            'results': [serialize_comment(comment) for comment in page],
+            'next': page.next_cursor,
+        }
+        return data
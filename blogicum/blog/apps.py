@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        # Pillow откажется открывать картинки-«бомбы» ещё по заголовку,
+        # в том числе в процессах пула обработки изображений
+        Image.MAX_IMAGE_PIXELS = settings.BLOG_IMAGE_MAX_PIXELS
+        from . import signals  # noqa: F401
+        from .search import ensure_search_triggers
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
@@ -0,0 +1,186 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Min
+from django.http import HttpResponse
+from django.utils import timezone
+
+POST_CARD_GENERATION_KEY = 'blog:post_card:generation'
+
+
+def invalidate_now_and_on_commit(func, *args):
+    """Сбрасывает кэш сразу и ещё раз после фиксации транзакции: иначе
+    параллельный запрос успеет закэшировать данные до коммита.
+
+    Вне транзакции on_commit выполнился бы сразу же, поэтому второй
+    сброс там не нужен.
+    """
+    func(*args)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: func(*args))
+
+
+def get_post_card_generation():
+    """Поколение кэша карточек.
+
+    Меняется при правках категорий и местоположений, которые
+    затрагивают сразу много карточек: вместо удаления тысяч ключей они
+    просто перестают совпадать.
+    """
+    return cache.get_or_set(POST_CARD_GENERATION_KEY, 1, None)
+
+
+def bump_post_card_generation():
+    try:
+        cache.incr(POST_CARD_GENERATION_KEY)
+    except ValueError:
+        cache.set(POST_CARD_GENERATION_KEY, 2, None)
+
+
+def post_card_key(post_id, generation=None):
+    if generation is None:
+        generation = get_post_card_generation()
+    version = settings.BLOG_POST_CARD_CACHE_VERSION
+    return f'blog:post_card:{version}:{generation}:{post_id}'
+
+
+def invalidate_post_cards(*post_ids):
+    generation = get_post_card_generation()
+    cache.delete_many([post_card_key(pk, generation) for pk in post_ids])
+
+
+# Кэш целых страниц для анонимных посетителей.
+#
+# Каждая страница помечается тегами (например, 'feed' или
+# 'category:<slug>'). У каждого тега в кэше хранится номер версии,
+# и он входит в ключ страницы: чтобы сбросить все страницы с тегом,
+# достаточно увеличить его версию.
+
+GLOBAL_TAG = 'global'
+
+
+def _tag_key(tag):
+    return f'blog:tag:{tag}'
+
+
+def get_tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_tags(*tags):
+    for tag in set(tags):
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.set(_tag_key(tag), 2, None)
+
+
+def category_tag(slug):
+    return f'category:{slug}'
+
+
+def author_tag(username):
+    return f'author:{username}'
+
+
+def page_cache_key(request, tags, absolute=False):
+    # Порядок параметров в адресе не должен плодить копии страницы
+    query = '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(request.GET.lists())
+        for value in values
+    )
+    # absolute — для ответов с абсолютными ссылками (ленты RSS):
+    # у каждого домена и схемы своя копия
+    path = request.build_absolute_uri(request.path) if absolute else (
+        request.path
+    )
+    return _tagged_key('blog:page:', f'{path}?{query}', tags)
+
+
+def get_post_page_tags(posts):
+    """Теги закэшированных страниц, на которых выводятся `posts`."""
+    tags = set()
+    for slug, username in posts.values_list(
+            'category__slug', 'author__username').distinct():
+        tags.add('feed')
+        if slug:
+            tags.add(category_tag(slug))
+        if username:
+            tags.add(author_tag(username))
+    return tags
+
+
+def _tagged_key(prefix, request_part, tags):
+    tags = [GLOBAL_TAG, *tags]
+    versions = get_tag_versions(tags)
+    raw = '|'.join([
+        request_part,
+        *(f'{tag}={version}' for tag, version in zip(tags, versions)),
+    ])
+    return prefix + hashlib.md5(raw.encode()).hexdigest()
+
+
+def seconds_until(moment):
+    return max(1, math.ceil((moment - timezone.now()).total_seconds()))
+
+
+NO_SCHEDULED_POSTS = 'none'
+
+
+def get_next_publication(tags, scheduled_posts):
+    """Ближайшая будущая pub_date среди `scheduled_posts`.
+
+    Результат кэшируется ровно до этого момента и сбрасывается вместе
+    с тегами страницы, так что запрос к БД выполняется редко.
+    """
+    key = _tagged_key('blog:next_publication:', '', tags)
+    now = timezone.now()
+    cached = cache.get(key)
+    if cached == NO_SCHEDULED_POSTS:
+        return None
+    if cached is not None and cached > now:
+        return cached
+
+    next_pub_date = scheduled_posts.filter(pub_date__gt=now).aggregate(
+        next=Min('pub_date'),
+    )['next']
+    if next_pub_date is None:
+        cache.set(key, NO_SCHEDULED_POSTS, settings.BLOG_PAGE_CACHE_TIMEOUT)
+    else:
+        cache.set(key, next_pub_date, seconds_until(next_pub_date))
+    return next_pub_date
+
+
+# Вместе со страницей храним валидаторы, чтобы отвечать 304 из кэша
+CACHED_PAGE_HEADERS = ('ETag', 'Last-Modified', 'Vary')
+
+
+def get_cached_page(key):
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content, content_type, headers = cached
+    response = HttpResponse(content, content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def set_cached_page(key, response, timeout):
+    headers = {
+        name: response[name]
+        for name in CACHED_PAGE_HEADERS if response.has_header(name)
+    }
+    cache.set(
+        key, (response.content, response['Content-Type'], headers), timeout
+    )
@@ -0,0 +1,174 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from .cache import (
+    author_tag, category_tag, get_cached_page, get_next_publication,
+    page_cache_key, seconds_until, set_cached_page,
+)
+from .models import Category, Post
+
+User = get_user_model()
+
+
+class CachedFeed(Feed):
+    """Лента, XML которой кэшируется целиком.
+
+    Ключ кэша включает версии тегов из get_feed_tags(), поэтому XML
+    сбрасывается теми же сигналами, что и кэш HTML-страниц, и устаревает
+    к выходу отложенной публикации. Лента одинакова для всех посетителей
+    одного домена, поэтому кэш общий для них.
+    """
+
+    def get_feed_tags(self, **kwargs):
+        return ['feed']
+
+    def get_scheduled_posts(self, **kwargs):
+        return Post.objects.filter(is_published=True)
+
+    def __call__(self, request, *args, **kwargs):
+        timeout = settings.BLOG_FEED_CACHE_TIMEOUT
+        if not timeout or request.method not in ('GET', 'HEAD'):
+            return self.render_feed(request, *args, **kwargs)
+
+        tags = self.get_feed_tags(**kwargs)
+        # Ссылки в XML абсолютные: они строятся по хосту и схеме запроса
+        key = page_cache_key(request, tags, absolute=True)
+        response = get_cached_page(key)
+        if response is None:
+            response = self.render_feed(request, *args, **kwargs)
+            next_pub_date = get_next_publication(
+                tags, self.get_scheduled_posts(**kwargs),
+            )
+            if next_pub_date is not None:
+                timeout = min(timeout, seconds_until(next_pub_date))
+            set_cached_page(key, response, timeout)
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response,
+        )
+
+    def render_feed(self, request, *args, **kwargs):
+        # Last-Modified по самой свежей записи выставляет сам Feed
+        response = super().__call__(request, *args, **kwargs)
+        response['ETag'] = quote_etag(
+            hashlib.md5(response.content).hexdigest()
+        )
+        return response
+
+
+class PostFeed(CachedFeed):
+    title = 'Блогикум'
+    description = 'Новые публикации Блогикума'
+
+    def link(self):
+        return reverse('blog:index')
+
+    def items(self):
+        return Post.objects.published().feed()[:settings.BLOG_FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author and item.author.username
+
+    def item_categories(self, item):
+        return [item.category.title] if item.category else []
+
+
+class CategoryFeed(PostFeed):
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, slug=category_slug, is_published=True,
+        )
+
+    def get_feed_tags(self, category_slug):
+        return [category_tag(category_slug)]
+
+    def get_scheduled_posts(self, category_slug):
+        return super().get_scheduled_posts().filter(
+            category__slug=category_slug,
+        )
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=[obj.slug])
+
+    def items(self, obj):
+        return obj.posts.published().feed()[:settings.BLOG_FEED_ITEMS]
+
+
+class AuthorFeed(PostFeed):
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def get_feed_tags(self, username):
+        return [author_tag(username)]
+
+    def get_scheduled_posts(self, username):
+        return super().get_scheduled_posts().filter(
+            author__username=username,
+        )
+
+    def title(self, obj):
+        return f'Блогикум: @{obj.username}'
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=[obj.username])
+
+    def items(self, obj):
+        return Post.objects.filter(author=obj).published().feed()[
+            :settings.BLOG_FEED_ITEMS
+        ]
+
+
+class AtomPostFeed(PostFeed):
+    feed_type = Atom1Feed
+    subtitle = PostFeed.description
+
+
+class AtomCategoryFeed(CategoryFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AtomAuthorFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
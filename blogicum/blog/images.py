@@ -0,0 +1,328 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_tags, get_post_page_tags, invalidate_post_cards
+from .models import ImageStatus, Post
+
+logger = logging.getLogger(__name__)
+
+RENDITION_SCALES = (1, 2)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def rendition_name(source_name, label, width, extension='jpg'):
+    """Имя файла уменьшенной копии рядом с оригиналом."""
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory, 'renditions', f'{stem}_{label}_{width}w.{extension}'
+    )
+
+
+def resize(image, width):
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def get_extra_formats():
+    """Дополнительные форматы из BLOG_IMAGE_EXTRA_FORMATS, которые умеет
+    записывать установленная сборка Pillow.
+    """
+    Image.init()
+    return {
+        extension: quality
+        for extension, quality in settings.BLOG_IMAGE_EXTRA_FORMATS.items()
+        if extension.upper() in Image.SAVE
+    }
+
+
+def encode(image, extension, quality, icc_profile):
+    buffer = BytesIO()
+    options = {'quality': quality}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if extension == 'jpg':
+        options.update(optimize=True, progressive=True)
+        image.save(buffer, 'JPEG', **options)
+    else:
+        image.save(buffer, extension.upper(), **options)
+    return buffer.getvalue()
+
+
+def encode_renditions(data, sizes, quality, extra_formats=None):
+    """Декодирует, уменьшает и сжимает изображение.
+
+    Выполняется в дочернем процессе, поэтому не обращается ни к базе,
+    ни к хранилищу файлов: получает байты оригинала и возвращает
+    {размер: [(scale, width, height, {расширение: байты}), ...]}.
+    Каждая копия есть в JPEG и в форматах `extra_formats`.
+    Копии шире оригинала не создаются.
+
+    Поворот из EXIF применяется к пикселям, а сами метаданные EXIF
+    (в том числе координаты съёмки) в копии не попадают; сохраняется
+    только цветовой профиль.
+    """
+    image = Image.open(BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    icc_profile = image.info.get('icc_profile')
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.info = {}
+    formats = {'jpg': quality, **(extra_formats or {})}
+
+    encoded = {}
+    for label, base_width in sizes.items():
+        variants = []
+        for scale in RENDITION_SCALES:
+            width = min(base_width * scale, image.width)
+            if variants and width <= variants[-1][1]:
+                break
+            resized = resize(image, width)
+            variants.append((scale, width, resized.height, {
+                extension: encode(
+                    resized, extension, format_quality, icc_profile,
+                )
+                for extension, format_quality in formats.items()
+            }))
+        encoded[label] = variants
+    return encoded
+
+
+def read_image(image_field):
+    with image_field.open('rb') as source:
+        return source.read()
+
+
+def store_renditions(image_field, encoded):
+    """Сохраняет готовые копии и возвращает метаданные
+    для Post.image_renditions.
+
+    Копии лежат в обычном хранилище рядом с оригиналом: их имена
+    и так однозначно выводятся из имени оригинала.
+    """
+    storage = default_storage
+    renditions = {'source': image_field.name}
+    for label, variants in encoded.items():
+        renditions[label] = []
+        for scale, width, height, contents in variants:
+            names = {}
+            for extension, content in contents.items():
+                name = rendition_name(
+                    image_field.name, label, width, extension,
+                )
+                storage.delete(name)
+                names[extension] = storage.save(name, ContentFile(content))
+            # name — JPEG для браузеров без поддержки остальных форматов
+            renditions[label].append({
+                'name': names.pop('jpg'), 'formats': names,
+                'width': width, 'height': height, 'scale': scale,
+            })
+    return renditions
+
+
+def delete_renditions(source_name):
+    """Удаляет все копии оригинала `source_name`."""
+    directory = posixpath.dirname(rendition_name(source_name, '', 0))
+    prefix = posixpath.splitext(posixpath.basename(source_name))[0] + '_'
+    if not default_storage.exists(directory):
+        return
+    for filename in default_storage.listdir(directory)[1]:
+        if filename.startswith(prefix):
+            default_storage.delete(posixpath.join(directory, filename))
+
+
+def build_renditions(image_field):
+    """Строит копии для всех размеров BLOG_IMAGE_RENDITIONS в текущем
+    процессе.
+    """
+    encoded = encode_renditions(
+        read_image(image_field), settings.BLOG_IMAGE_RENDITIONS,
+        settings.BLOG_IMAGE_QUALITY, get_extra_formats(),
+    )
+    return store_renditions(image_field, encoded)
+
+
+def needs_renditions(post):
+    return bool(post.image) and (
+        post.image_renditions.get('source') != post.image.name
+    )
+
+
+def set_image_status(post_id, source_name, status):
+    """Меняет статус, только если картинка поста не сменилась."""
+    return Post.objects.filter(pk=post_id, image=source_name).update(
+        image_status=status,
+    )
+
+
+def save_renditions(post, renditions):
+    """Записывает метаданные копий и сбрасывает кэш страниц поста.
+
+    Метаданные записываются, только если картинка поста не сменилась,
+    пока копии строились.
+    """
+    posts = Post.objects.filter(pk=post.pk, image=renditions['source'])
+    updated = posts.update(
+        image_renditions=renditions, image_status=ImageStatus.READY,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        post.image_renditions = renditions
+        post.image_status = ImageStatus.READY
+        invalidate_post_cards(post.pk)
+        bump_tags(*get_post_page_tags(posts))
+    return updated
+
+
+def reuse_renditions(post):
+    """Берёт готовые копии у другого поста с той же картинкой.
+
+    Одинаковые файлы хранилище картинок сохраняет один раз, поэтому
+    повторная загрузка той же фотографии не требует новой обработки.
+    """
+    renditions = Post.objects.filter(
+        image=post.image.name, image_status=ImageStatus.READY,
+    ).exclude(pk=post.pk).values_list('image_renditions', flat=True).first()
+    if not renditions or renditions.get('source') != post.image.name:
+        return 0
+    return save_renditions(post, renditions)
+
+
+def update_renditions(post):
+    """Строит копии картинки поста синхронно, в текущем процессе."""
+    return save_renditions(post, build_renditions(post.image))
+
+
+class BackgroundPool:
+    """Пул процессов для сжатия картинок и всё, что с ним связано.
+
+    slots ограничивает число заданий в очереди пула, а результаты
+    сохраняет отдельный поток finisher: колбэки future выполняются
+    в служебном потоке ProcessPoolExecutor, и запись в базу и хранилище
+    там задерживала бы выдачу остальных результатов.
+    """
+
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=settings.BLOG_IMAGE_WORKERS,
+        )
+        self.slots = threading.BoundedSemaphore(
+            settings.BLOG_IMAGE_MAX_PENDING,
+        )
+        self.finisher = ThreadPoolExecutor(max_workers=1)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.finisher.shutdown(wait=False)
+
+
+def get_pool():
+    """Общий для процесса пул воркеров, создаётся при первом задании."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BackgroundPool()
+        return _pool
+
+
+def reset_pool(pool):
+    """Отбрасывает пул, если дочерний процесс аварийно завершился.
+
+    Следующее задание создаст новый пул вместе с новым счётчиком
+    очереди; задания старого пула освобождают места в своём.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown()
+
+
+def submit_renditions(executor, post):
+    """Отправляет картинку поста в пул и помечает пост как обрабатываемый."""
+    future = executor.submit(
+        encode_renditions, read_image(post.image),
+        dict(settings.BLOG_IMAGE_RENDITIONS), settings.BLOG_IMAGE_QUALITY,
+        get_extra_formats(),
+    )
+    set_image_status(post.pk, post.image.name, ImageStatus.PROCESSING)
+    return future
+
+
+def finish_renditions(post, future):
+    """Сохраняет результат задания из пула или помечает ошибку."""
+    try:
+        renditions = store_renditions(post.image, future.result())
+        return save_renditions(post, renditions)
+    except Exception:
+        logger.exception(
+            'Не удалось построить копии изображения поста %s', post.pk
+        )
+        set_image_status(post.pk, post.image.name, ImageStatus.FAILED)
+        return 0
+
+
+def finish_in_background(pool, post, future):
+    # Поток finisher живёт долго: соединение с базой проверяется
+    # до и закрывается после работы, как в обработчике запроса
+    close_old_connections()
+    try:
+        finish_renditions(post, future)
+    finally:
+        pool.slots.release()
+        close_old_connections()
+
+
+def process_in_background(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not needs_renditions(post):
+        return
+    pool = get_pool()
+    # Очередь пула ограничена: лишние посты остаются в статусе «в очереди»
+    # и их подберёт команда process_images
+    if not pool.slots.acquire(blocking=False):
+        return
+    try:
+        future = submit_renditions(pool.executor, post)
+    except (BrokenProcessPool, RuntimeError):
+        pool.slots.release()
+        reset_pool(pool)
+        logger.warning('Пул обработки изображений недоступен, пост %s '
+                       'остаётся в очереди', post_id)
+        return
+
+    def done(future):
+        try:
+            pool.finisher.submit(finish_in_background, pool, post, future)
+        except RuntimeError:
+            # Пул уже сброшен: пост остаётся в статусе «обрабатывается»,
+            # его подберёт process_images --retry
+            pool.slots.release()
+
+    future.add_done_callback(done)
+
+
+def schedule_renditions(post):
+    """Ставит картинку поста в очередь на обработку.
+
+    Пока статус не READY, шаблоны показывают оригинал. Задание уходит
+    в пул процессов после фиксации транзакции.
+    """
+    if reuse_renditions(post):
+        return
+    Post.objects.filter(pk=post.pk).update(image_status=ImageStatus.PENDING)
+    post.image_status = ImageStatus.PENDING
+    transaction.on_commit(lambda: process_in_background(post.pk))
@@ -0,0 +1,169 @@
+import json
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+
+from .models import ImageStatus
+
+# Модели в порядке зависимостей: сначала те, на которые ссылаются
+IMPORT_ORDER = (
+    'blog.category', 'blog.location', get_user_model()._meta.label_lower,
+    'blog.post', 'blog.comment',
+)
+
+# Поля из старых фикстур: у категорий дата создания называлась created_at
+LEGACY_FIELDS = {
+    'blog.category': {'created_at': 'pub_date'},
+}
+
+SKIP = re.compile(r'[\s,\[\]]*')
+
+
+def iter_json_objects(stream, chunk_size=64 * 1024):
+    """Объекты из JSON-массива (формат dumpdata) или из NDJSON.
+
+    Файл читается кусками по chunk_size, каждый объект разбирается
+    через raw_decode сразу, как только прочитан целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    while True:
+        position = SKIP.match(buffer, position).end()
+        if position < len(buffer):
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Объект ещё не дочитан — или файл действительно испорчен
+                if eof:
+                    raise
+            else:
+                yield obj
+                continue
+        elif eof:
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+@contextmanager
+def preserved_timestamps(models):
+    """Отключает auto_now и auto_now_add, чтобы bulk_create сохранил
+    даты из файла, а не текущее время.
+    """
+    switched = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            flags = (
+                getattr(field, 'auto_now', False),
+                getattr(field, 'auto_now_add', False),
+            )
+            if any(flags):
+                switched.append((field, flags))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in switched:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Накапливает объекты по моделям и сохраняет их пачками через
+    bulk_create, без сигналов и посредством одного INSERT на пачку.
+    """
+
+    def __init__(self, batch_size=1000, ignore_conflicts=False):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.models = {label: apps.get_model(label) for label in IMPORT_ORDER}
+        self.pending = {label: [] for label in IMPORT_ORDER}
+        self.created = Counter()
+        self.skipped = Counter()
+        self.dropped_fields = Counter()
+        self.commented_post_ids = set()
+        self.now = timezone.now()
+
+    def add(self, obj):
+        label = obj.get('model', '').lower()
+        if label not in self.models:
+            self.skipped[label] += 1
+            return
+        self.pending[label].append(
+            self.build(self.models[label], obj.get('pk'), obj['fields'])
+        )
+        if len(self.pending[label]) >= self.batch_size:
+            self.flush(label)
+
+    def convert_fields(self, opts, fields):
+        """Значения полей из файла по attname модели.
+
+        Поля старых фикстур переименовываются, неизвестные поля
+        и связи многие-ко-многим отбрасываются с подсчётом.
+        """
+        renames = LEGACY_FIELDS.get(opts.label_lower, {})
+        values = {}
+        for name, value in fields.items():
+            name = renames.get(name, name)
+            try:
+                # get_field понимает и имя поля, и attname (author_id)
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or field.many_to_many or not field.concrete:
+                if field is None or value:
+                    self.dropped_fields[f'{opts.label_lower}.{name}'] += 1
+                continue
+            values[field.attname] = (
+                value if field.is_relation else field.to_python(value)
+            )
+        return values
+
+    def build(self, model, pk, fields):
+        opts = model._meta
+        values = self.convert_fields(opts, fields)
+        for field in opts.concrete_fields:
+            auto = getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False)
+            if auto and values.get(field.attname) is None:
+                values[field.attname] = self.now
+        if opts.label_lower == 'blog.post':
+            if values.get('image') and not values.get('image_renditions'):
+                values.setdefault('image_status', ImageStatus.PENDING)
+        if opts.label_lower == 'blog.comment':
+            self.commented_post_ids.add(values.get('post_id'))
+        return model(pk=pk, **values)
+
+    def flush(self, label):
+        batch = self.pending[label]
+        if not batch:
+            return
+        model = self.models[label]
+        with preserved_timestamps([model]):
+            model.objects.bulk_create(
+                batch, ignore_conflicts=self.ignore_conflicts,
+            )
+        self.created[label] += len(batch)
+        self.pending[label] = []
+
+    def flush_all(self):
+        for label in IMPORT_ORDER:
+            self.flush(label)
+
+    def table_names(self):
+        return [
+            self.models[label]._meta.db_table
+            for label in IMPORT_ORDER if self.created[label]
+        ]
+
+    def imported_models(self):
+        return [
+            self.models[label] for label in IMPORT_ORDER
+            if self.created[label]
+        ]
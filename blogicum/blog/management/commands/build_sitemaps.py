@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.sitemaps import build_lock, build_sitemaps, get_sitemap_root
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает карту сайта в BLOG_SITEMAP_ROOT. Переписываются только '
+        'файлы, содержимое которых изменилось с прошлой сборки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Построить все файлы заново.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        # Ждёт, пока закончится сборка, начатая запросом к карте сайта
+        with build_lock():
+            written = build_sitemaps(full=options['full'])
+        elapsed = time.monotonic() - started
+        for name in written:
+            self.stdout.write(f'Записан {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Карта сайта в {get_sitemap_root()}: переписано файлов '
+            f'{len(written)} за {elapsed:.1f} с'
+        ))
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from blog.models import Category, Post
+from blog.pagination import KeysetPaginator
+from blog.views import CategoryListView, PostListView, ProfileListView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает план выполнения (EXPLAIN) запросов, которые строят '
+        'ленты на главной странице, на странице категории и в профиле: '
+        'первой страницы (OFFSET) и глубокой страницы по курсору.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--category', help='slug категории; по умолчанию — первая '
+                               'опубликованная.')
+        parser.add_argument(
+            '--username', help='Автор для ленты профиля; по умолчанию — '
+                               'автор последнего поста.')
+        parser.add_argument(
+            '--depth', type=int, default=10,
+            help='Номер страницы, с которой строится курсор для '
+                 'keyset-запроса; если постов меньше — последняя.')
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Передать СУБД опцию ANALYZE (если поддерживается).')
+        parser.add_argument(
+            '--sql', action='store_true',
+            help='Печатать также текст SQL-запроса.')
+
+    def handle(self, *args, **options):
+        slug = options['category'] or Category.objects.filter(
+            is_published=True).values_list('slug', flat=True).first()
+        username = options['username'] or Post.objects.filter(
+            author__isnull=False).order_by('-pub_date').values_list(
+            'author__username', flat=True).first()
+        if slug is None or username is None:
+            raise CommandError(
+                'Нет данных для построения лент: укажите --category и '
+                '--username.')
+
+        listings = (
+            ('blog:index', PostListView, {}),
+            ('blog:category_posts', CategoryListView,
+             {'category_slug': slug}),
+            ('blog:profile', ProfileListView, {'username': username}),
+        )
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        for name, view_class, kwargs in listings:
+            view = view_class()
+            view.setup(request, **kwargs)
+            queryset = view.get_queryset()
+            self.explain(
+                f'{name} (offset)', queryset[:view.paginate_by], options,
+                explain_options,
+            )
+            keyset = self.keyset_queryset(view, queryset, options['depth'])
+            if keyset is not None:
+                self.explain(
+                    f'{name} (cursor)', keyset, options, explain_options,
+                )
+
+    def keyset_queryset(self, view, queryset, depth):
+        """Запрос страницы по курсору от поста на странице `depth`."""
+        paginator = KeysetPaginator(
+            queryset, view.paginate_by, view.cursor_keys,
+        )
+        ordered = queryset.order_by(
+            *(f'-{key}' for key in view.cursor_keys)
+        ).values(*view.cursor_keys)
+        offset = depth * view.paginate_by
+        row = ordered[offset:offset + 1].first() or ordered.last()
+        if row is None:
+            return None
+        return paginator.page_queryset(
+            'next', paginator.get_key_values(row),
+        )
+
+    def explain(self, title, queryset, options, explain_options):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        if options['sql']:
+            self.stdout.write(str(queryset.query))
+        self.stdout.write(queryset.explain(**explain_options))
+        self.stdout.write('')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import iter_ndjson, parse_bounds
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает категории, местоположения, посты и комментарии '
+        'в NDJSON, не загружая таблицы в память целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.')
+        parser.add_argument(
+            '--since', help='Только посты, опубликованные с этой даты.')
+        parser.add_argument(
+            '--until', help='Только посты, опубликованные по эту дату.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз.')
+
+    def handle(self, *args, **options):
+        try:
+            bounds = parse_bounds(options['since'], options['until'])
+        except ValueError as error:
+            raise CommandError(error)
+        lines = iter_ndjson(chunk_size=options['chunk_size'], **bounds)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                count = self.write(output, lines)
+            self.stderr.write(f'Выгружено объектов: {count}')
+        else:
+            self.write(self.stdout, lines)
+
+    def write(self, output, lines):
+        count = 0
+        for line in lines:
+            output.write(line)
+            count += 1
+        return count
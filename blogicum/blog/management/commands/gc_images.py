@@ -0,0 +1,139 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.images import delete_renditions
+from blog.models import ImageBlob, Post
+from blog.storage import image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы картинок, на которые не ссылается ни один пост, '
+        'вместе с их уменьшенными копиями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=24 * 60 * 60,
+            help='Не трогать файлы, загруженные или повторно загруженные '
+                 'менее этого числа секунд назад.')
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Сначала пересчитать ссылки по таблице постов.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов обрабатывать за раз.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = self.recount(options['batch_size'])
+            self.stdout.write(f'Исправлено счётчиков ссылок: {fixed}')
+
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        garbage = ImageBlob.objects.filter(
+            ref_count=0, updated_at__lt=cutoff,
+        ).order_by('pk')
+        removed = freed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                garbage.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for blob in batch:
+                if options['dry_run']:
+                    self.stdout.write(blob.name)
+                    continue
+                if self.delete_blob(blob):
+                    removed += 1
+                    freed += blob.size
+        swept = self.sweep_untracked(
+            cutoff, options['batch_size'], options['dry_run'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {removed}, освобождено {freed // 1024} КБ; '
+            f'файлов без учёта: {swept}'
+        ))
+
+    def delete_blob(self, blob):
+        # Запись блокируется до удаления файла: повторная загрузка того же
+        # содержимого ждёт коммита, а затем видит, что файла нет,
+        # и записывает его заново (см. ContentAddressedStorage._save)
+        with transaction.atomic():
+            locked = ImageBlob.objects.select_for_update().filter(
+                pk=blob.pk, ref_count=0, updated_at=blob.updated_at,
+            ).first()
+            # Файл могли снова загрузить или прикрепить к посту,
+            # пока шла сборка
+            if locked is None:
+                return False
+            locked.delete()
+            image_storage.delete(blob.name)
+            delete_renditions(blob.name)
+        return True
+
+    def sweep_untracked(self, cutoff, batch_size, dry_run):
+        """Удаляет файлы без записи ImageBlob старше `cutoff`.
+
+        Такие файлы остаются, если транзакция с загрузкой откатилась:
+        запись откатывается вместе с ней, а файл на диске — нет.
+        """
+        cutoff = cutoff.timestamp()
+        candidates = (
+            name for name, modified in image_storage.iter_hashed_files()
+            if modified < cutoff
+        )
+        swept = 0
+        while True:
+            batch = list(islice(candidates, batch_size))
+            if not batch:
+                return swept
+            known = set(
+                ImageBlob.objects.filter(name__in=batch)
+                .values_list('name', flat=True)
+            ) | set(
+                Post.objects.filter(image__in=batch)
+                .values_list('image', flat=True)
+            )
+            for name in batch:
+                if name in known:
+                    continue
+                if dry_run:
+                    self.stdout.write(name)
+                    continue
+                image_storage.delete(name)
+                delete_renditions(name)
+                swept += 1
+
+    def recount(self, batch_size):
+        fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                ImageBlob.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'name', 'ref_count')[:batch_size]
+            )
+            if not batch:
+                return fixed
+            last_pk = batch[-1][0]
+            live = dict(
+                Post.objects.filter(image__in=[name for _, name, _ in batch])
+                .values('image').annotate(total=Count('pk'))
+                .values_list('image', 'total')
+            )
+            for pk, name, ref_count in batch:
+                if live.get(name, 0) != ref_count:
+                    ImageBlob.objects.filter(pk=pk).update(
+                        ref_count=live.get(name, 0),
+                    )
+                    fixed += 1
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.images import finish_renditions, needs_renditions, submit_renditions
+from blog.models import ImageStatus, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит копии картинок постов, ожидающих обработки: тех, что не '
+        'поместились в очередь пула веб-процесса или пропали из неё '
+        'при перезапуске.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Число процессов; по умолчанию BLOG_IMAGE_WORKERS.')
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько постов отправлять в пул за раз.')
+        parser.add_argument(
+            '--retry', action='store_true',
+            help='Обработать заново также посты со статусом «ошибка» '
+                 'и зависшие в статусе «обрабатывается».')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Запускаться повторно каждые --interval секунд.')
+        parser.add_argument(
+            '--interval', type=int, default=10,
+            help='Пауза между запусками в режиме --loop.')
+
+    def handle(self, *args, **options):
+        statuses = [ImageStatus.PENDING]
+        if options['retry']:
+            statuses += [ImageStatus.PROCESSING, ImageStatus.FAILED]
+        workers = options['workers'] or settings.BLOG_IMAGE_WORKERS
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                done, failed = self.drain(
+                    executor, statuses, options['batch_size'],
+                )
+                if done or failed:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Обработано картинок: {done}, ошибок: {failed}'
+                    ))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+    def drain(self, executor, statuses, batch_size):
+        queue = Post.objects.filter(image_status__in=statuses).only(
+            'pk', 'image', 'image_renditions',
+        ).order_by('pk')
+        done = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(queue.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return done, failed
+            last_pk = batch[-1].pk
+            futures = {}
+            for post in batch:
+                if not needs_renditions(post):
+                    Post.objects.filter(pk=post.pk).update(
+                        image_status=ImageStatus.READY if post.image else '',
+                    )
+                    continue
+                try:
+                    futures[submit_renditions(executor, post)] = post
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post.pk}: {error}')
+                    Post.objects.filter(pk=post.pk).update(
+                        image_status=ImageStatus.FAILED,
+                    )
+            for future in as_completed(futures):
+                if finish_renditions(futures[future], future):
+                    done += 1
+                else:
+                    failed += 1
@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from blog.cache import bump_tags, get_post_page_tags
+from blog.models import Post
+
+LAST_TICK_KEY = 'blog:publish_scheduled:last_tick'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сбрасывает и заново прогревает кэш ленты, категорий и профилей, '
+        'в которых с прошлого запуска вышли отложенные публикации. '
+        'Работает только с общим для всех процессов бэкендом кэша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lookback', type=int, default=None,
+            help='За сколько секунд искать вышедшие посты при первом '
+                 'запуске; по умолчанию BLOG_PAGE_CACHE_TIMEOUT.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Запускаться повторно каждые --interval секунд.')
+        parser.add_argument(
+            '--interval', type=int, default=30,
+            help='Пауза между запусками в режиме --loop.')
+        parser.add_argument(
+            '--no-warm', action='store_false', dest='warm',
+            help='Только сбросить кэш, не отрисовывая страницы заново.')
+
+    def handle(self, *args, **options):
+        lookback = timedelta(seconds=(
+            options['lookback'] or settings.BLOG_PAGE_CACHE_TIMEOUT
+        ))
+        while True:
+            self.tick(lookback, options['warm'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def tick(self, lookback, warm):
+        now = timezone.now()
+        since = cache.get(LAST_TICK_KEY) or now - lookback
+        went_live = Post.objects.published().filter(
+            pub_date__gt=since, pub_date__lte=now,
+        )
+        tags = get_post_page_tags(went_live)
+        if tags:
+            bump_tags(*tags)
+            if warm:
+                for path in self.get_first_pages(went_live):
+                    self.warm(path)
+        cache.set(LAST_TICK_KEY, now, None)
+        self.stdout.write(
+            f'{now:%Y-%m-%d %H:%M:%S}: сброшено тегов кэша — {len(tags)}'
+        )
+
+    def get_first_pages(self, posts):
+        paths = {reverse('blog:index')}
+        for slug, username in posts.values_list(
+                'category__slug', 'author__username'):
+            paths.add(reverse('blog:category_posts', args=[slug]))
+            if username:
+                paths.add(reverse('blog:profile', args=[username]))
+        return sorted(paths)
+
+    def warm(self, path):
+        """Отрисовывает страницу как для анонимного посетителя.
+
+        Кэш страниц сохраняет результат.
+        """
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(path)
+        response = request.resolver_match.func(
+            request, *request.resolver_match.args,
+            **request.resolver_match.kwargs,
+        )
+        if hasattr(response, 'render'):
+            response.render()
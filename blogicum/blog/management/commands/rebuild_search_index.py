@@ -0,0 +1,101 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.models import Post, SearchIndexState
+from blog.search import (
+    delete_orphaned_rows, fts_available, reindex_posts, reindex_range,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс постов пачками по первичному '
+        'ключу. Прерванная перестройка продолжается с места остановки; '
+        'с --incremental переиндексируются только изменённые посты '
+        '(удалённые посты убирает из индекса триггер).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов индексировать за одну транзакцию.')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Переиндексировать только посты, изменённые с прошлого '
+                 'запуска.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать полную перестройку заново, даже если '
+                 'предыдущая не завершилась.')
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Удалить из индекса строки постов, которых нет в базе. '
+                 'Обычно их удаляет триггер; нужен полный проход по индексу.')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Индекс FTS5 поддерживается только в SQLite.')
+        state, _ = SearchIndexState.objects.get_or_create(name='posts')
+        started = time.monotonic()
+        if options['incremental']:
+            if state.watermark is None:
+                raise CommandError(
+                    'Индекс ещё ни разу не строился: запустите команду '
+                    'без --incremental.')
+            indexed = self.incremental(state, options['batch_size'])
+        else:
+            indexed = self.full(
+                state, options['batch_size'], options['restart'],
+            )
+        if options['prune']:
+            removed = delete_orphaned_rows()
+            self.stdout.write(f'Удалено из индекса: {removed}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed} за {elapsed:.1f} с'
+        ))
+
+    def full(self, state, batch_size, restart):
+        if restart or state.rebuild_started_at is None:
+            state.last_pk = 0
+            state.rebuild_started_at = timezone.now()
+            state.save()
+        elif state.last_pk:
+            self.stdout.write(f'Продолжение с поста {state.last_pk}')
+        indexed = 0
+        while True:
+            last_pk, count = reindex_range(state.last_pk, batch_size)
+            if last_pk is None:
+                break
+            indexed += count
+            # Прогресс сохраняется после каждой пачки: после сбоя
+            # работа продолжится со следующей
+            state.last_pk = last_pk
+            state.save(update_fields=['last_pk'])
+        # Всё, что изменилось во время перестройки, подхватит
+        # следующий инкрементальный запуск
+        state.watermark = state.rebuild_started_at
+        state.last_pk = 0
+        state.rebuild_started_at = None
+        state.save()
+        return indexed
+
+    def incremental(self, state, batch_size):
+        now = timezone.now()
+        changed = Post.objects.filter(
+            updated_at__gte=state.watermark
+        ).order_by('pk').values_list('pk', flat=True)
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(changed.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            reindex_posts(batch)
+            indexed += len(batch)
+            last_pk = batch[-1]
+        state.watermark = now
+        state.save(update_fields=['watermark'])
+        return indexed
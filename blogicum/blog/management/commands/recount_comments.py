@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Исправляет расхождения денормализованного счётчика '
+        'comment_count с реальным числом комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов проверять за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            with transaction.atomic():
+                drifted = Post.objects.filter(
+                    pk__gte=batch[0], pk__lte=last_pk,
+                ).with_comment_count().exclude(
+                    comment_count=F('live_comment_count'),
+                ).values_list('pk', flat=True)
+                fixed += Post.objects.filter(
+                    pk__in=list(drifted),
+                ).recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {fixed}'
+        ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import needs_renditions, update_renditions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии картинок постов. По умолчанию только '
+        'для постов, у которых копий нет или они устарели.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='rebuild_all',
+            help='Перестроить копии для всех постов с картинками, например '
+                 'после изменения BLOG_IMAGE_RENDITIONS.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько постов загружать из базы за раз.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).only('pk', 'image', 'image_renditions').order_by('pk')
+        built = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                if not options['rebuild_all'] and not needs_renditions(post):
+                    continue
+                try:
+                    update_renditions(post)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post.pk}: {error}')
+                else:
+                    built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Построены копии для постов: {built}, ошибок: {failed}'
+        ))
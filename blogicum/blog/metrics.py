@@ -0,0 +1,288 @@
+"""Метрики в текстовом формате Prometheus.
+
+Значения копятся в памяти процесса. Если задан BLOG_METRICS_DIR,
+каждый процесс раз в BLOG_METRICS_FLUSH_INTERVAL секунд сбрасывает
+свои значения в файл metrics-<pid>.json, а /metrics суммирует все
+файлы каталога: так счётчики видны целиком при нескольких
+WSGI-процессах. Файлы завершившихся процессов не удаляются, чтобы
+счётчики не уменьшались; каталог очищают при развёртывании.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Metric:
+
+    def __init__(self, name, documentation, labelnames, buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+
+    @property
+    def type(self):
+        return 'counter' if self.buckets is None else 'histogram'
+
+    def empty(self):
+        if self.buckets is None:
+            return 0
+        # Счётчики по корзинам (без +Inf), сумма и число наблюдений
+        return [[0] * len(self.buckets), 0, 0]
+
+    def update(self, value, amount):
+        if self.buckets is None:
+            return value + amount
+        counts, total, count = value
+        for index, bound in enumerate(self.buckets):
+            if amount <= bound:
+                counts[index] += 1
+                break
+        return [counts, total + amount, count + 1]
+
+    def merge(self, value, other):
+        if self.buckets is None:
+            return value + other
+        return [
+            [a + b for a, b in zip(value[0], other[0])],
+            value[1] + other[1], value[2] + other[2],
+        ]
+
+
+def escape_label(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in pairs
+    ) + '}'
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        # Файл процесса пишет только один поток за раз
+        self.flush_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pid = os.getpid()
+            self.values = {}
+            self.last_flush = time.monotonic()
+            self.baseline_loaded = False
+
+    def counter(self, name, documentation, labelnames=()):
+        self.metrics[name] = Metric(name, documentation, labelnames)
+        return name
+
+    def histogram(self, name, documentation, labelnames=(), buckets=()):
+        self.metrics[name] = Metric(
+            name, documentation, labelnames, tuple(buckets),
+        )
+        return name
+
+    def inc(self, name, labels, amount=1):
+        self.record(name, labels, amount)
+
+    def observe(self, name, labels, value):
+        self.record(name, labels, value)
+
+    def record(self, name, labels, amount):
+        metric = self.metrics[name]
+        labels = tuple(str(label) for label in labels)
+        with self.lock:
+            if os.getpid() != self.pid:
+                # Процесс-потомок (gunicorn --preload): значения
+                # родителя не наследуются
+                self.pid, self.values = os.getpid(), {}
+                self.baseline_loaded = False
+            series = self.values.setdefault(name, {})
+            series[labels] = metric.update(
+                series.get(labels, metric.empty()), amount,
+            )
+        if self.directory:
+            self.flush(settings.BLOG_METRICS_FLUSH_INTERVAL)
+
+    @property
+    def directory(self):
+        directory = settings.BLOG_METRICS_DIR
+        return directory and Path(directory)
+
+    def process_file(self, pid):
+        return self.directory / f'metrics-{pid}.json'
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), value] for labels, value in series.items()
+                ]
+                for name, series in self.values.items()
+            }
+
+    def load_baseline(self):
+        """Файл с тем же pid мог остаться от завершившегося процесса:
+        его значения продолжаются, а не затираются.
+        """
+        self.baseline_loaded = True
+        for name, rows in self.read(self.process_file(self.pid)).items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            series = self.values.setdefault(name, {})
+            for labels, value in rows:
+                labels = tuple(labels)
+                series[labels] = metric.merge(
+                    series.get(labels, metric.empty()), value,
+                )
+
+    def flush(self, interval=None):
+        """Сбрасывает значения процесса в его файл, если с прошлого сброса
+        прошло больше `interval` секунд (без интервала — сразу).
+
+        Ошибки записи только попадают в лог: метрики не должны ломать
+        обработку запроса.
+        """
+        if not self.directory:
+            return
+        with self.flush_lock:
+            if interval is not None and (
+                    time.monotonic() - self.last_flush <= interval):
+                return
+            # При ошибке следующая попытка — тоже через интервал
+            self.last_flush = time.monotonic()
+            try:
+                self.write_process_file()
+            except OSError:
+                logger.exception('Не удалось сохранить метрики процесса')
+
+    def write_process_file(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self.baseline_loaded:
+            with self.lock:
+                self.load_baseline()
+        path = self.process_file(self.pid)
+        temporary = path.with_name(
+            f'{path.name}.{threading.get_ident()}.tmp'
+        )
+        try:
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, path)
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+
+    @staticmethod
+    def read(path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def collect(self):
+        """Значения всех процессов: {имя: {метки: значение}}."""
+        if not self.directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = [
+                self.read(path)
+                for path in sorted(self.directory.glob('metrics-*.json'))
+            ]
+        collected = {}
+        for snapshot in snapshots:
+            for name, rows in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                series = collected.setdefault(name, {})
+                for labels, value in rows:
+                    labels = tuple(labels)
+                    series[labels] = metric.merge(
+                        series.get(labels, metric.empty()), value,
+                    )
+        return collected
+
+    def expose(self):
+        """Текстовый формат Prometheus 0.0.4."""
+        collected = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, value in sorted(collected.get(name, {}).items()):
+                if metric.buckets is None:
+                    label_text = format_labels(metric.labelnames, labels)
+                    lines.append(f'{name}{label_text} {value}')
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    cumulative += bucket_count
+                    label_text = format_labels(
+                        metric.labelnames, labels, [('le', bound)],
+                    )
+                    lines.append(f'{name}_bucket{label_text} {cumulative}')
+                label_text = format_labels(
+                    metric.labelnames, labels, [('le', '+Inf')],
+                )
+                lines.append(f'{name}_bucket{label_text} {count}')
+                label_text = format_labels(metric.labelnames, labels)
+                lines.append(f'{name}_sum{label_text} {total}')
+                lines.append(f'{name}_count{label_text} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+REQUESTS = registry.counter(
+    'blog_http_requests_total', 'Число HTTP-запросов.',
+    ('view', 'method', 'status'),
+)
+REQUEST_DURATION = registry.histogram(
+    'blog_http_request_duration_seconds', 'Время обработки запроса.',
+    ('view',), DURATION_BUCKETS,
+)
+DB_QUERIES = registry.histogram(
+    'blog_db_queries_per_request', 'Число SQL-запросов на HTTP-запрос.',
+    ('view',), QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = registry.counter(
+    'blog_db_query_duration_seconds_total', 'Суммарное время SQL-запросов.',
+    ('view',),
+)
+
+
+def observe_request(request, response, timings, duration):
+    # Запросы мимо маршрутов сводятся в одну серию, иначе число серий
+    # росло бы с каждым случайным адресом
+    match = request.resolver_match
+    view = match.view_name if match else 'unmatched'
+    registry.inc(REQUESTS, (view, request.method, response.status_code))
+    registry.observe(REQUEST_DURATION, (view,), duration)
+    registry.observe(DB_QUERIES, (view,), timings.queries)
+    registry.inc(DB_DURATION, (view,), timings.sql_time)
@@ -0,0 +1,110 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import observe_request
+from .slow_queries import is_slow, log_slow_query
+
+logger = logging.getLogger('blog.timing')
+
+
+class RequestTimings:
+    """Счётчики одного запроса; сам объект и есть обёртка
+    connection.execute_wrapper. Заодно отправляет медленные запросы
+    в журнал blog/slow_queries.py.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.sql_time += duration
+            self.queries += 1
+        if is_slow(duration):
+            match = self.request.resolver_match
+            log_slow_query(
+                context['connection'], sql, params, many, duration,
+                match.view_name if match else None,
+            )
+        return result
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        self.render_time += time.perf_counter() - self.render_started
+
+
+class RequestTimingMiddleware:
+    """Число SQL-запросов, время SQL и отрисовки шаблона и размер ответа.
+
+    Данные уходят в заголовок Server-Timing, если включён
+    BLOG_SERVER_TIMING (их видно в DevTools браузера), и в метрики
+    /metrics (см. blog/metrics.py), а запросы дольше
+    BLOG_SLOW_REQUEST_MS пишутся строками JSON в лог 'blog.timing'.
+    На запрос добавляется лишь пара вызовов perf_counter() на каждый
+    SQL-запрос, поэтому middleware можно держать включённым
+    в продакшене. Должна стоять первой в MIDDLEWARE, чтобы учитывать
+    время остальных.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = request._timings = RequestTimings(request)
+        started = time.perf_counter()
+        with connection.execute_wrapper(timings):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        if settings.BLOG_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={timings.sql_time * 1000:.1f};'
+                f'desc="{timings.queries} queries"',
+                f'tpl;dur={timings.render_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        if total * 1000 >= settings.BLOG_SLOW_REQUEST_MS:
+            self.log(request, response, timings, total)
+        if settings.BLOG_METRICS_ENABLED:
+            observe_request(request, response, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается прямо перед response.render(): middleware первая
+        # в списке, а этот метод вызывается в обратном порядке
+        timings = request._timings
+        timings.start_render()
+        response.add_post_render_callback(timings.finish_render)
+        return response
+
+    def log(self, request, response, timings, total):
+        match = request.resolver_match
+        data = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(timings.sql_time * 1000, 1),
+            'queries': timings.queries,
+            'render_ms': round(timings.render_time * 1000, 1),
+            # Размер потокового ответа заранее неизвестен
+            'bytes': None if response.streaming else len(response.content),
+        }
+        logger.warning(
+            json.dumps(data, ensure_ascii=False), extra={'timing': data},
+        )
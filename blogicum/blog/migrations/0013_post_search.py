@@ -0,0 +1,60 @@
+from django.db import migrations
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        title, text, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_update AFTER UPDATE OF title, text
+    ON blog_post BEGIN
+        UPDATE blog_post_fts SET title = new.title, text = new.text
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        DELETE FROM blog_post_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO blog_post_fts (rowid, title, text)
+    SELECT id, title, text FROM blog_post
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TABLE IF EXISTS blog_post_fts',
+]
+
+
+def run_on_sqlite(statements):
+    def operation(apps, schema_editor):
+        # FTS5 есть только в SQLite; на других СУБД поиск работает
+        # через icontains (см. blog.search)
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='posts', max_length=64, unique=True)),
+                ('last_pk', models.PositiveIntegerField(default=0)),
+                ('rebuild_started_at', models.DateTimeField(blank=True, null=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'состояние поискового индекса',
+                'verbose_name_plural': 'Состояние поискового индекса',
+            },
+        ),
+    ]
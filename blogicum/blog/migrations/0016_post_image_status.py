@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+def fill_image_status(apps, schema_editor):
+    # Посты с картинками без копий подберёт команда process_images
+    Post = apps.get_model('blog', 'Post')
+    with_image = Post.objects.exclude(image='').exclude(image__isnull=True)
+    with_image.update(image_status='pending')
+    with_image.exclude(image_renditions={}).update(image_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('pending', 'В очереди'), ('processing', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка')], editable=False, max_length=16, verbose_name='Обработка изображения'),
+        ),
+        migrations.RunPython(fill_image_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:16
+
+import blog.storage
+import blog.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=blog.storage.ContentAddressedStorage(), upload_to='birthday/', validators=[blog.uploads.validate_image_upload], verbose_name='Фото'),
+        ),
+    ]
@@ -0,0 +1,212 @@
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .cache import (
+    get_cached_page, get_next_publication, page_cache_key, seconds_until,
+    set_cached_page,
+)
+from .models import Post
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+class CursorPaginationMixin:
+    """Включает keyset-пагинацию для ListView вместо OFFSET.
+
+    Режим выбирается атрибутом `pagination_mode` или, если он не задан,
+    настройкой BLOG_PAGINATION_MODE ('offset' или 'cursor').
+    """
+
+    pagination_mode = None
+    cursor_keys = ('pub_date', 'id')
+    cursor_kwarg = 'cursor'
+
+    def get_pagination_mode(self):
+        return self.pagination_mode or getattr(
+            settings, 'BLOG_PAGINATION_MODE', 'offset'
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.get_pagination_mode() != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.cursor_keys)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_pagination'] = (
+            self.get_pagination_mode() == 'cursor'
+        )
+        # Остальные GET-параметры (например, поисковый запрос)
+        # сохраняются в ссылках на соседние страницы
+        query = self.request.GET.copy()
+        query.pop(self.cursor_kwarg, None)
+        query.pop(self.page_kwarg, None)
+        context['cursor_base_query'] = query.urlencode()
+        return context
+
+
+class UploadErrorsMixin:
+    """Показывает в форме файлы, отклонённые GuardedUploadHandler."""
+
+    def form_valid(self, form):
+        errors = getattr(self.request, 'upload_errors', {})
+        for field, error in errors.items():
+            form.add_error(field, error)
+        if errors:
+            return self.form_invalid(form)
+        return super().form_valid(form)
+
+
+class AnonymousPageCacheMixin:
+    """Кэширует страницу целиком для анонимных посетителей.
+
+    Авторизованные пользователи (в том числе автор в своём профиле)
+    всегда получают свежую страницу. Ключ страницы включает версии тегов
+    из get_page_cache_tags(), которые сбрасываются сигналами моделей.
+    """
+
+    page_cache_timeout = None
+
+    def get_page_cache_tags(self):
+        return []
+
+    def get_scheduled_posts(self):
+        """Отложенные посты, которые могут появиться на этой странице."""
+        return Post.objects.filter(is_published=True)
+
+    def get_page_cache_timeout(self):
+        timeout = self.page_cache_timeout or settings.BLOG_PAGE_CACHE_TIMEOUT
+        next_pub_date = get_next_publication(
+            self.get_page_cache_tags(), self.get_scheduled_posts(),
+        )
+        if next_pub_date is not None:
+            # Страница должна устареть ровно к выходу отложенного поста
+            timeout = min(timeout, seconds_until(next_pub_date))
+        return timeout
+
+    def page_cache_applies(self, request):
+        return (
+            settings.BLOG_PAGE_CACHE_TIMEOUT
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.page_cache_applies(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, self.get_page_cache_tags())
+        cached = get_cached_page(key)
+        if cached is not None:
+            return get_conditional_response(
+                request,
+                etag=cached.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    cached.get('Last-Modified', '')),
+                response=cached,
+            )
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(rendered):
+                if not rendered.cookies:
+                    set_cached_page(
+                        key, rendered, self.get_page_cache_timeout()
+                    )
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, не отрисовывая шаблон, если у клиента
+    (или CDN) уже есть актуальная копия страницы.
+
+    Валидаторы строятся в render_to_response() по уже загруженным данным
+    страницы, поэтому дополнительных запросов к БД не требуется.
+    """
+
+    def get_validator_data(self, context):
+        """Возвращает список значений для ETag и дату для Last-Modified.
+
+        None — у страницы нет валидаторов, она отрисовывается как обычно.
+        """
+        return None
+
+    def get_viewer_key(self):
+        # Страница отличается для разных пользователей, а в формах
+        # зашит CSRF-токен, поэтому они входят в ETag.
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        return f'{user.pk}:{self.request.META.get("CSRF_COOKIE", "")}'
+
+    def get_validators(self, context):
+        data = self.get_validator_data(context)
+        if data is None:
+            return None
+        parts, last_modified = data
+        raw = '|'.join(map(str, [
+            self.request.get_full_path(), self.get_viewer_key(), *parts,
+        ]))
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = timegm(
+                min(last_modified, timezone.now()).utctimetuple()
+            )
+        return etag, last_modified
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.method not in ('GET', 'HEAD'):
+            return super().render_to_response(context, **response_kwargs)
+        validators = self.get_validators(context)
+        if validators is None:
+            return super().render_to_response(context, **response_kwargs)
+        etag, last_modified = validators
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            response = super().render_to_response(context, **response_kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class PostListConditionalGetMixin(ConditionalGetMixin):
+    """Валидаторы для лент: посты текущей страницы и признаки пагинации.
+
+    Last-Modified для лент не отдаётся: удаление поста с другой страницы
+    меняет состав текущей, но не сдвигает её даты. ETag это учитывает.
+    """
+
+    def get_validator_data(self, context):
+        page = context.get('page_obj')
+        posts = page if page is not None else context['object_list']
+        parts = []
+        if page is not None:
+            parts.append((page.has_previous(), page.has_next()))
+            if not context.get('cursor_pagination'):
+                parts.append(page.paginator.count)
+        for post in posts:
+            parts.append((
+                post.pk, post.updated_at,
+                post.category and post.category.updated_at,
+                post.location and post.location.updated_at,
+                post.author and post.author.username,
+            ))
+        return parts, None
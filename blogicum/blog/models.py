@@ -1,7 +1,64 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 
+from .storage import image_storage
+from .uploads import validate_image_upload
+
+
+class PostQuerySet(models.QuerySet):
+    """Единое место для правил видимости и формы запроса лент."""
+
+    def published(self):
+        """Посты, которые видны всем.
+
+        Опубликованы, дата публикации наступила, категория опубликована.
+        """
+        return self.filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True,
+        )
+
+    def with_feed_relations(self):
+        return self.select_related('author', 'category', 'location')
+
+    def with_comment_count(self):
+        """Число комментариев, посчитанное по таблице комментариев.
+
+        Аннотация называется live_comment_count: в отличие от поля
+        comment_count, она не может разойтись с таблицей.
+        """
+        return self.annotate(live_comment_count=Count('comments'))
+
+    def feed(self):
+        """Выборка для карточек ленты.
+
+        Один SQL-запрос со связанными объектами; число комментариев
+        хранится в самом посте.
+        """
+        return self.with_feed_relations().order_by('-pub_date', '-id')
+
+    def recount_comments(self):
+        """Пересчитывает comment_count одним UPDATE для всей выборки."""
+        live_count = Comment.objects.filter(
+            post=OuterRef('pk'),
+        ).order_by().values('post').annotate(
+            total=Count('pk'),
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(live_count), Value(0))
+        )
+
+
+class ImageStatus(models.TextChoices):
+    PENDING = 'pending', 'В очереди'
+    PROCESSING = 'processing', 'Обрабатывается'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка'
+
 
 class Post(models.Model):
     title = models.CharField(max_length=256, verbose_name = 'Заголовок')
@@ -14,14 +71,52 @@ class Post(models.Model):
     category = models.ForeignKey('Category', on_delete=models.SET_NULL, null=True, blank=False, verbose_name = 'Категория', related_name='posts')
     is_published = models.BooleanField(default=True, verbose_name = 'Опубликовано', help_text='Снимите галочку, чтобы скрыть публикацию.')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name = 'Добавлено')
+    # Денормализованный счётчик: обновляется сигналами комментариев,
+    # расхождения исправляет команда recount_comments.
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Число комментариев'
+    )
+    # Меняется и при изменении комментариев поста (см. blog/signals.py)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     image = models.ImageField(
-        'Фото', upload_to='birthday/', null=True, blank=True
+        'Фото', upload_to='birthday/', storage=image_storage,
+        validators=[validate_image_upload], null=True, blank=True,
+    )
+    # Уменьшенные копии image, см. blog/images.py
+    image_renditions = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name='Копии изображения',
+    )
+    image_status = models.CharField(
+        max_length=16, choices=ImageStatus.choices, blank=True,
+        editable=False, verbose_name='Обработка изображения',
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'публикация' 
         verbose_name_plural = 'Публикации'
+        # Индексы под выборки лент: общая, по автору и по категории
+        # фильтруют по is_published и сортируют по убыванию pub_date.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_published_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=['category', '-pub_date', '-id'],
+                name='post_category_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+        ]
 
     def __str__(self):
         return f'Номер поста {self.pk}'
@@ -33,6 +128,7 @@ class Category(models.Model):
     slug = models.SlugField(unique=True, verbose_name = 'Идентификатор', help_text='Идентификатор страницы для URL; разрешены символы латиницы, цифры, дефис и подчёркивание.')
     is_published = models.BooleanField(default=True, verbose_name='Опубликовано', help_text='Снимите галочку, чтобы скрыть публикацию.')
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name = 'Добавлено')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     class Meta:
         verbose_name = 'категория' 
@@ -46,6 +142,7 @@ class Location(models.Model):
     name = models.CharField(max_length=256, verbose_name = 'Название места')
     is_published = models.BooleanField(default=True, verbose_name='Опубликовано', help_text='Снимите галочку, чтобы скрыть публикацию.')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name = 'Добавлено')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     class Meta:
         verbose_name = 'местоположение' 
@@ -68,3 +165,46 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'Комментарий {self.pk} к посту {self.post.pk}'
+
+
+class SearchIndexState(models.Model):
+    """Прогресс команды rebuild_search_index.
+
+    last_pk — докуда дошла прерванная полная перестройка,
+    watermark — момент, с которого инкрементальный режим ищет
+    изменённые посты.
+    """
+
+    name = models.CharField(max_length=64, unique=True, default='posts')
+    last_pk = models.PositiveIntegerField(default=0)
+    rebuild_started_at = models.DateTimeField(null=True, blank=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'состояние поискового индекса'
+        verbose_name_plural = 'Состояние поискового индекса'
+
+    def __str__(self):
+        return self.name
+
+
+class ImageBlob(models.Model):
+    """Файл в ContentAddressedStorage и число ссылающихся на него постов.
+
+    Счётчик обновляют сигналы Post, файлы без ссылок удаляет команда
+    gc_images.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Обновляется и при повторной загрузке того же содержимого
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,165 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключей в токен для URL."""
+    payload = [direction] + [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(payload, list) or len(payload) < 2:
+        raise InvalidCursor(token)
+    direction, *values = payload
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+class CursorPage:
+    """Страница keyset-пагинации. Не знает общего числа объектов,
+    зато одинаково дёшева на любой глубине.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.make_cursor('next', self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.make_cursor('prev', self.object_list[0])
+
+
+class KeysetPaginator:
+    """Пагинация по ключу (cursor pagination) в порядке убывания `keys`.
+
+    Вместо OFFSET следующая страница выбирается условием
+    «строго меньше последнего показанного ключа», поэтому запрос
+    использует индекс и не требует COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, keys=('pub_date', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = tuple(keys)
+
+    def get_key_values(self, obj):
+        # Строки values() приходят словарями
+        if isinstance(obj, dict):
+            return [obj[key] for key in self.keys]
+        return [getattr(obj, key) for key in self.keys]
+
+    def make_cursor(self, direction, obj):
+        return encode_cursor(direction, self.get_key_values(obj))
+
+    def _to_python(self, key, value):
+        try:
+            field = self.queryset.model._meta.get_field(key)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def _seek(self, values, lookup):
+        """Лексикографическое сравнение кортежа ключей с `values`.
+
+        Дополнительное ограничение по первому ключу позволяет СУБД
+        начать сканирование индекса сразу с нужного места.
+        """
+        condition = Q()
+        for index, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[index]})
+            for prev_key, prev_value in zip(self.keys[:index], values):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        return Q(**{f'{self.keys[0]}__{lookup}e': values[0]}) & condition
+
+    def decode(self, cursor):
+        """Направление и значения ключей из курсора."""
+        if not cursor:
+            return 'next', None
+        direction, values = decode_cursor(cursor)
+        if len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._to_python(key, value)
+                for key, value in zip(self.keys, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def page_queryset(self, direction, values):
+        """Запрос страницы (на одну строку больше, чтобы узнать, есть ли
+        следующая). Отдельно от page(), чтобы его можно было EXPLAIN.
+        """
+        queryset = self.queryset
+        if direction == 'next':
+            if values is not None:
+                queryset = queryset.filter(self._seek(values, 'lt'))
+            queryset = queryset.order_by(*(f'-{key}' for key in self.keys))
+        else:
+            queryset = queryset.filter(self._seek(values, 'gt'))
+            queryset = queryset.order_by(*self.keys)
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        direction, values = self.decode(cursor)
+        rows = list(self.page_queryset(direction, values))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'next':
+            return CursorPage(
+                rows, self, has_next=has_more, has_previous=values is not None
+            )
+        rows.reverse()
+        return CursorPage(rows, self, has_next=True, has_previous=has_more)
@@ -0,0 +1,156 @@
+import re
+
+from django.db import connection, connections, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'blog_post_fts'
+
+MATCHING_ROWIDS = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+# Релевантность: FTS5 rank (bm25) тем меньше, чем лучше совпадение,
+# поэтому знак меняется, чтобы KeysetPaginator сортировал по убыванию.
+# Поиск по rowid и MATCH в FTS5 — точечный, а не полный перебор.
+SEARCH_RANK = (
+    f'SELECT -rank FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s AND rowid = blog_post.id'
+)
+
+
+# Те же триггеры создаёт миграция 0013. SQLite при изменении схемы
+# пересоздаёт таблицу blog_post и теряет их, поэтому после каждой
+# миграции недостающие триггеры создаются заново.
+SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+    AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, text = new.text
+        WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+    AFTER DELETE ON blog_post BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """Обработчик post_migrate: восстанавливает триггеры индекса."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        if FTS_TABLE not in db.introspection.table_names(cursor):
+            return
+        for statement in SEARCH_TRIGGERS:
+            cursor.execute(statement)
+
+
+def get_search_terms(query):
+    """Слова запроса без операторов и кавычек FTS5."""
+    return re.findall(r'\w+', query or '')[:10]
+
+
+def build_match_expression(terms):
+    """Все слова должны встретиться; последнее — как префикс."""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def search_posts(queryset, query):
+    """Отбирает посты queryset по запросу и аннотирует `search_rank`.
+
+    На SQLite поиск идёт по виртуальной таблице FTS5, которую
+    поддерживают триггеры из миграции 0013; на других СУБД —
+    медленный запасной вариант через icontains.
+    """
+    terms = get_search_terms(query)
+    if not terms or not fts_available():
+        condition = Q(pk__in=[])
+        if terms:
+            condition = Q()
+            for term in terms:
+                condition &= Q(title__icontains=term) | Q(text__icontains=term)
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    match = build_match_expression(terms)
+    return queryset.filter(
+        pk__in=RawSQL(MATCHING_ROWIDS, (match,)),
+    ).annotate(
+        search_rank=RawSQL(SEARCH_RANK, (match,), output_field=FloatField()),
+    )
+
+
+def reindex_range(after_pk, batch_size):
+    """Переиндексирует следующую пачку постов с pk > after_pk.
+
+    Строки индекса в том же диапазоне pk удаляются заранее, так что
+    заодно пропадают записи удалённых постов. Возвращает pk последнего
+    поста пачки (None, если посты закончились) и размер пачки.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT id, title, text FROM blog_post WHERE id > %s '
+            'ORDER BY id LIMIT %s',
+            [after_pk, batch_size],
+        )
+        rows = cursor.fetchall()
+        if rows:
+            last_pk = rows[-1][0]
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid > %s AND rowid <= %s',
+                [after_pk, last_pk],
+            )
+        else:
+            last_pk = None
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid > %s', [after_pk]
+            )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            rows,
+        )
+    return last_pk, len(rows)
+
+
+def reindex_posts(pks):
+    """Перезаписывает строки индекса для постов с указанными pk."""
+    pks = list(pks)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in pks],
+        )
+        placeholders = ', '.join(['%s'] * len(pks))
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'SELECT id, title, text FROM blog_post '
+            f'WHERE id IN ({placeholders})',
+            pks,
+        )
+
+
+def delete_orphaned_rows():
+    """Удаляет из индекса посты, которых больше нет в blog_post."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN '
+            '(SELECT id FROM blog_post)'
+        )
+        return cursor.rowcount
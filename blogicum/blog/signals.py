@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import (
+    GLOBAL_TAG, author_tag, bump_post_card_generation, bump_tags,
+    get_post_page_tags, invalidate_now_and_on_commit, invalidate_post_cards,
+)
+from .images import needs_renditions, schedule_renditions
+from .models import Category, Comment, ImageBlob, Location, Post
+
+User = get_user_model()
+
+
+# Комментарии отдельно время изменения не хранят: любое их изменение
+# сдвигает updated_at поста, по которому строятся ETag и Last-Modified.
+
+@receiver(post_save, sender=Comment)
+def update_post_on_comment_save(sender, instance, created, **kwargs):
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def update_post_on_comment_delete(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(invalidate_post_cards, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def build_post_image_renditions(sender, instance, **kwargs):
+    # Пока копий нет, шаблоны показывают оригинал
+    if needs_renditions(instance):
+        schedule_renditions(instance)
+
+
+def count_image_reference(name, delta):
+    # Файлы, загруженные до появления учёта ссылок, в ImageBlob не попали
+    # и сборщиком мусора не удаляются
+    if name:
+        ImageBlob.objects.filter(name=name).update(
+            ref_count=Greatest(F('ref_count') + delta, 0),
+        )
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    instance._image_before = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('image', flat=True).first()
+        if instance.pk else None
+    ) or ''
+
+
+@receiver(post_save, sender=Post)
+def count_post_image_references(sender, instance, **kwargs):
+    before = getattr(instance, '_image_before', '')
+    after = instance.image.name or ''
+    if before != after:
+        count_image_reference(after, 1)
+        count_image_reference(before, -1)
+    instance._image_before = after
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    count_image_reference(instance.image.name, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(invalidate_post_cards, instance.post_id)
+    tags = get_post_page_tags(Post.objects.filter(pk=instance.post_id))
+    invalidate_now_and_on_commit(bump_tags, *tags)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_page_tags(sender, instance, **kwargs):
+    # Пост мог сменить категорию или автора — сбросим и прежние страницы
+    instance._page_tags_before = (
+        get_post_page_tags(Post.objects.filter(pk=instance.pk))
+        if instance.pk else set()
+    )
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    tags = getattr(instance, '_page_tags_before', set())
+    tags |= get_post_page_tags(Post.objects.filter(pk=instance.pk))
+    invalidate_now_and_on_commit(bump_tags, *tags)
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    tags = get_post_page_tags(Post.objects.filter(pk=instance.pk))
+    invalidate_now_and_on_commit(bump_tags, *tags)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_all_post_cards(sender, **kwargs):
+    invalidate_now_and_on_commit(bump_post_card_generation)
+    invalidate_now_and_on_commit(bump_tags, GLOBAL_TAG)
+
+
+# Поля автора, которые выводятся в карточках и на страницах постов
+AUTHOR_DISPLAY_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def saves_author_display_fields(update_fields):
+    # Вход пользователя, например, сохраняет только last_login
+    return not update_fields or bool(
+        set(update_fields) & set(AUTHOR_DISPLAY_FIELDS)
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_author_display_fields(sender, instance, update_fields=None,
+                                   **kwargs):
+    instance._display_fields_before = (
+        User.objects.filter(pk=instance.pk)
+        .values_list(*AUTHOR_DISPLAY_FIELDS).first()
+        if instance.pk and saves_author_display_fields(update_fields)
+        else None
+    )
+
+
+def author_display_changed(instance, created, update_fields):
+    # У нового пользователя ещё нет постов
+    if created or not saves_author_display_fields(update_fields):
+        return False
+    after = tuple(getattr(instance, name) for name in AUTHOR_DISPLAY_FIELDS)
+    return getattr(instance, '_display_fields_before', None) != after
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_post_cards(sender, instance, created,
+                                 update_fields=None, **kwargs):
+    if not author_display_changed(instance, created, update_fields):
+        return
+    # Сбрасываются карточки только этого автора, а не всего сайта
+    post_ids = list(
+        Post.objects.filter(author=instance).values_list('pk', flat=True)
+    )
+    invalidate_now_and_on_commit(invalidate_post_cards, *post_ids)
+    # Страницы с постами автора: лента, их категории и профиль под
+    # прежним и новым именем
+    tags = get_post_page_tags(Post.objects.filter(author=instance))
+    tags.add(author_tag(instance.username))
+    before = getattr(instance, '_display_fields_before', None)
+    if before:
+        tags.add(author_tag(before[0]))
+    invalidate_now_and_on_commit(bump_tags, *tags)
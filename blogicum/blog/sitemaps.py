@@ -0,0 +1,358 @@
+"""Карты сайта для поисковых роботов.
+
+Файлы строятся на диск (BLOG_SITEMAP_ROOT) и отдаются как статические.
+Каждый раздел (посты, категории, профили) делится на файлы не более чем
+по BLOG_SITEMAP_LIMIT адресов; общий sitemap.xml — индекс этих файлов.
+
+Строки читаются через iterator() и пишутся в файл сразу, поэтому
+память не зависит от числа постов. В manifest.json для каждого файла
+хранятся граница по первичному ключу и подпись содержимого: при
+повторной сборке переписываются только файлы, подпись которых
+изменилась.
+"""
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from itertools import chain, islice
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import locks
+from django.db.models import Count, Max, Q, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Category, Post
+
+User = get_user_model()
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+INDEX_NAME = 'sitemap.xml'
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.lock'
+
+
+def latest(*moments):
+    moments = [moment for moment in moments if moment is not None]
+    return max(moments) if moments else None
+
+
+def format_lastmod(moment):
+    return moment.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+def absolute_url(path):
+    return settings.BLOG_SITE_URL.rstrip('/') + path
+
+
+def write_atomic(path, lines):
+    """Пишет файл построчно во временный и подменяет им старый.
+
+    Так читатели не увидят недописанный файл.
+    """
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.writelines(lines)
+    os.replace(temporary, path)
+
+
+class SitemapSection:
+    """Раздел карты сайта.
+
+    get_queryset() возвращает values()-выборку с ключом 'pk';
+    location() и lastmod() строят по строке адрес и дату изменения.
+    По умолчанию адрес — url_name с аргументом из поля url_field,
+    дата — поле updated_at, а сам раздел пуст.
+    """
+
+    name = None
+    url_name = None
+    url_field = 'pk'
+
+    def get_queryset(self):
+        return Post.objects.none().values('pk')
+
+    def location(self, row):
+        return reverse(self.url_name, args=[row[self.url_field]])
+
+    def lastmod(self, row):
+        return row.get('updated_at')
+
+    def entries(self, queryset):
+        for row in queryset.order_by('pk').iterator(chunk_size=2000):
+            yield row['pk'], self.location(row), self.lastmod(row)
+
+    def signature(self, queryset):
+        """Подпись содержимого файла.
+
+        По умолчанию — хэш всех строк: разделы категорий и профилей
+        небольшие.
+        """
+        digest = hashlib.md5()
+        for pk, location, lastmod in self.entries(queryset):
+            digest.update(f'{pk} {location} {lastmod}\n'.encode())
+        return digest.hexdigest()
+
+
+class PostSection(SitemapSection):
+    name = 'posts'
+    url_name = 'blog:post_detail'
+
+    def get_queryset(self):
+        return Post.objects.published().values('pk', 'pub_date', 'updated_at')
+
+    def lastmod(self, row):
+        # Комментарии тоже сдвигают updated_at поста (см. blog/signals.py)
+        return latest(row['pub_date'], row['updated_at'])
+
+    def signature(self, queryset):
+        # Адрес поста зависит только от pk, поэтому хватает одного
+        # агрегирующего запроса вместо чтения всех строк файла
+        summary = queryset.order_by().aggregate(
+            count=Count('pk'), pk_sum=Sum('pk'),
+            pub_date=Max('pub_date'), updated_at=Max('updated_at'),
+        )
+        return ':'.join(str(value) for value in summary.values())
+
+
+class CategorySection(SitemapSection):
+    name = 'categories'
+    url_name = 'blog:category_posts'
+    url_field = 'slug'
+
+    def get_queryset(self):
+        published = Q(
+            posts__is_published=True, posts__pub_date__lte=timezone.now(),
+        )
+        return Category.objects.filter(is_published=True).values(
+            'pk', 'slug', 'updated_at',
+        ).annotate(
+            last_pub_date=Max('posts__pub_date', filter=published),
+            last_updated_at=Max('posts__updated_at', filter=published),
+        )
+
+    def lastmod(self, row):
+        return latest(
+            row['updated_at'], row['last_pub_date'], row['last_updated_at'],
+        )
+
+
+class ProfileSection(SitemapSection):
+    """Профили авторов, у которых есть опубликованные посты."""
+
+    name = 'profiles'
+    url_name = 'blog:profile'
+    url_field = 'username'
+
+    def get_queryset(self):
+        published = Q(
+            post__is_published=True, post__pub_date__lte=timezone.now(),
+            post__category__is_published=True,
+        )
+        return User.objects.values('pk', 'username').annotate(
+            last_pub_date=Max('post__pub_date', filter=published),
+            last_updated_at=Max('post__updated_at', filter=published),
+        ).filter(last_pub_date__isnull=False)
+
+    def lastmod(self, row):
+        return latest(row['last_pub_date'], row['last_updated_at'])
+
+
+SECTIONS = (PostSection(), CategorySection(), ProfileSection())
+
+
+def get_sitemap_root():
+    return Path(settings.BLOG_SITEMAP_ROOT)
+
+
+def read_manifest(root):
+    try:
+        with open(root / MANIFEST_NAME, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def sitemap_lines(entries, stats):
+    """Строки XML одного файла.
+
+    По ходу считает число адресов, последний pk и самую позднюю дату
+    изменения.
+    """
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<urlset xmlns="{SITEMAP_NS}">\n'
+    )
+    for pk, location, lastmod in entries:
+        stats['count'] += 1
+        stats['last_pk'] = pk
+        line = f'<url><loc>{escape(absolute_url(location))}</loc>'
+        if lastmod is not None:
+            stats['lastmod'] = latest(stats['lastmod'], lastmod)
+            line += f'<lastmod>{format_lastmod(lastmod)}</lastmod>'
+        yield line + '</url>\n'
+    yield '</urlset>\n'
+
+
+def write_chunks(section, queryset, root, after, limit):
+    """Пишет строки выборки (pk > after) в файлы по `limit` адресов."""
+    chunks = []
+    entries = section.entries(queryset.filter(pk__gt=after))
+    for first in entries:
+        name = f'sitemap-{section.name}-{first[0]}.xml'
+        stats = {'count': 0, 'last_pk': None, 'lastmod': None}
+        write_atomic(root / name, sitemap_lines(
+            chain([first], islice(entries, limit - 1)), stats,
+        ))
+        # Подпись — по закрытому диапазону: посты, добавленные после
+        # записи файла, изменят её при следующей сборке
+        rows = queryset.filter(pk__gt=after, pk__lte=stats['last_pk'])
+        chunks.append({
+            'file': name,
+            'last_pk': stats['last_pk'],
+            'count': stats['count'],
+            'lastmod': stats['lastmod'] and format_lastmod(stats['lastmod']),
+            'signature': section.signature(rows),
+        })
+        after = stats['last_pk']
+    return chunks
+
+
+def build_section(section, root, old_chunks, limit, written):
+    """Файлы раздела: неизменившиеся берутся из манифеста как есть.
+
+    Каждый файл покрывает диапазон pk от границы предыдущего до своей;
+    последний открыт сверху, в него попадают новые посты. Если в
+    диапазон перестали помещаться `limit` адресов, остаток раздела
+    делится на файлы заново.
+    """
+    queryset = section.get_queryset()
+    chunks, after = [], 0
+    for index, old in enumerate(old_chunks):
+        final = index == len(old_chunks) - 1
+        rows = queryset.filter(pk__gt=after)
+        if not final:
+            rows = rows.filter(pk__lte=old['last_pk'])
+        if (root / old['file']).exists() and (
+                section.signature(rows) == old['signature']):
+            chunks.append(old)
+            after = old['last_pk']
+            continue
+        if final or rows.count() > limit:
+            break
+        for chunk in write_chunks(section, rows, root, after, limit):
+            chunk['last_pk'] = old['last_pk']
+            chunks.append(chunk)
+            written.append(chunk['file'])
+        after = old['last_pk']
+    else:
+        if old_chunks:
+            return chunks
+    new_chunks = write_chunks(section, queryset, root, after, limit)
+    written.extend(chunk['file'] for chunk in new_chunks)
+    return chunks + new_chunks
+
+
+def index_lines(manifest):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    )
+    for chunks in manifest['sections'].values():
+        for chunk in chunks:
+            path = reverse('blog:sitemap_section', args=[chunk['file'][:-4]])
+            line = f'<sitemap><loc>{escape(absolute_url(path))}</loc>'
+            if chunk['lastmod']:
+                line += f'<lastmod>{chunk["lastmod"]}</lastmod>'
+            yield line + '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+@contextmanager
+def build_lock(blocking=True):
+    """Файловая блокировка сборки, общая для всех процессов.
+
+    Отдаёт True, если блокировка взята. При blocking=False не ждёт:
+    если карту уже собирает другой процесс, отдаёт False.
+    """
+    root = get_sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    flags = locks.LOCK_EX if blocking else locks.LOCK_EX | locks.LOCK_NB
+    with open(root / LOCK_NAME, 'wb') as file:
+        acquired = locks.lock(file, flags)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                locks.unlock(file)
+
+
+def build_sitemaps(full=False):
+    """Собирает карту сайта и возвращает имена переписанных файлов.
+
+    При full=True, а также при смене BLOG_SITE_URL или
+    BLOG_SITEMAP_LIMIT все файлы строятся заново.
+    """
+    root = get_sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    limit = settings.BLOG_SITEMAP_LIMIT
+    old = read_manifest(root)
+    if full or old.get('base_url') != settings.BLOG_SITE_URL or (
+            old.get('limit') != limit):
+        old = {}
+    written = []
+    manifest = {
+        'base_url': settings.BLOG_SITE_URL,
+        'limit': limit,
+        'generated_at': format_lastmod(timezone.now()),
+        'sections': {
+            section.name: build_section(
+                section, root, old.get('sections', {}).get(section.name, []),
+                limit, written,
+            )
+            for section in SECTIONS
+        },
+    }
+    write_atomic(root / INDEX_NAME, index_lines(manifest))
+    write_atomic(root / MANIFEST_NAME, [json.dumps(manifest, indent=1)])
+    # Файлы, которых больше нет в индексе
+    kept = {
+        chunk['file']
+        for chunks in manifest['sections'].values() for chunk in chunks
+    }
+    for path in root.glob('sitemap-*.xml'):
+        if path.name not in kept:
+            path.unlink()
+    return written
+
+
+def sitemaps_are_fresh():
+    try:
+        modified = (get_sitemap_root() / MANIFEST_NAME).stat().st_mtime
+    except OSError:
+        return False
+    age = timezone.now().timestamp() - modified
+    return age < settings.BLOG_SITEMAP_MAX_AGE
+
+
+def sitemaps_exist():
+    return (get_sitemap_root() / INDEX_NAME).exists()
+
+
+def refresh_sitemaps():
+    """Дособирает устаревшую карту для запроса.
+
+    Пока карты нет, запросы ждут её сборки. Устаревшую карту
+    дособирает только процесс, первым взявший блокировку; остальные
+    сразу отдают прежние файлы.
+    """
+    if sitemaps_are_fresh():
+        return
+    blocking = not sitemaps_exist()
+    with build_lock(blocking) as acquired:
+        # Пока ждали блокировку, карту мог собрать другой процесс
+        if acquired and not sitemaps_are_fresh():
+            build_sitemaps()
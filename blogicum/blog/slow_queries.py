@@ -0,0 +1,85 @@
+"""Журнал медленных SQL-запросов.
+
+Запросы дольше BLOG_SLOW_QUERY_MS пишутся в лог 'blog.slow_queries'
+строками JSON вместе с именем view и планом выполнения. План
+запрашивается отдельным запросом к базе, поэтому в журнал попадает
+только доля BLOG_SLOW_QUERY_SAMPLE_RATE медленных запросов.
+"""
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger('blog.slow_queries')
+
+MAX_PARAMS_LENGTH = 1000
+EXPLAIN_SAVEPOINT = 'blog_slow_query_explain'
+
+
+def is_slow(duration):
+    threshold = settings.BLOG_SLOW_QUERY_MS
+    return (
+        threshold is not None and duration * 1000 >= threshold
+        and random.random() < settings.BLOG_SLOW_QUERY_SAMPLE_RATE
+    )
+
+
+def explain(connection, sql, params):
+    """План запроса: EXPLAIN QUERY PLAN в SQLite, EXPLAIN в остальных
+    базах. Только для SELECT: EXPLAIN не должен ничего менять.
+
+    Курсор берётся напрямую у драйвера, в обход execute_wrapper, чтобы
+    сам EXPLAIN не попал ни в замеры, ни в этот журнал. Внутри
+    транзакции EXPLAIN выполняется в точке сохранения: ошибка в нём
+    не должна обрывать транзакцию (PostgreSQL после ошибки отклоняет
+    все запросы до отката).
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else (
+        'EXPLAIN '
+    )
+    ops = connection.ops
+    savepoint = (
+        connection.in_atomic_block and connection.features.uses_savepoints
+    )
+    cursor = connection.create_cursor()
+    try:
+        if savepoint:
+            cursor.execute(ops.savepoint_create_sql(EXPLAIN_SAVEPOINT))
+        try:
+            # Ошибки драйвера приводятся к исключениям Django
+            with connection.wrap_database_errors:
+                cursor.execute(prefix + sql, params or ())
+                rows = cursor.fetchall()
+        except DatabaseError as error:
+            if savepoint:
+                cursor.execute(
+                    ops.savepoint_rollback_sql(EXPLAIN_SAVEPOINT)
+                )
+            return [f'EXPLAIN не выполнен: {error}']
+        finally:
+            if savepoint:
+                cursor.execute(ops.savepoint_commit_sql(EXPLAIN_SAVEPOINT))
+    finally:
+        cursor.close()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+def log_slow_query(connection, sql, params, many, duration, view):
+    record = {
+        'time': timezone.now().isoformat(),
+        'db': connection.alias,
+        'view': view,
+        'duration_ms': round(duration * 1000, 1),
+        'sql': sql,
+        'params': repr(params)[:MAX_PARAMS_LENGTH],
+        'plan': None if many else explain(connection, sql, params),
+    }
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
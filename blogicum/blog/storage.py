@@ -0,0 +1,79 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+# <каталог>/ab/cd/abcd<ещё 60 символов хэша>.<расширение>
+HASHED_NAME = re.compile(
+    r'^(?:.+/)?([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(?:\.\w+)?$'
+)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем из SHA-256 их содержимого.
+
+    Файл `birthday/photo.JPG` сохраняется как
+    `birthday/ab/cd/abcd….jpg`: два уровня каталогов по первым байтам
+    хэша не дают каталогам разрастаться. Повторная загрузка того же
+    содержимого не пишет файл заново, а возвращает имя уже сохранённого.
+    Учёт ссылок ведёт модель ImageBlob, удаляет ненужные файлы команда
+    gc_images.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, hexdigest[:2], hexdigest[2:4], hexdigest + extension,
+        )
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        # Сначала запись о файле, потом проверка самого файла: если
+        # gc_images успел удалить файл, он будет записан заново
+        self.register_blob(name, content.size)
+        if not self.exists(name):
+            return super()._save(name, content)
+        # Файл без записи ImageBlob (её транзакция откатилась) gc_images
+        # удаляет по возрасту: повторная загрузка его «омолаживает»
+        os.utime(self.path(name))
+        return name
+
+    def register_blob(self, name, size):
+        # Свежая отметка времени защищает файл от сборщика мусора,
+        # пока форма с ним ещё не сохранена
+        ImageBlob = apps.get_model('blog', 'ImageBlob')
+        touched = ImageBlob.objects.filter(name=name).update(
+            updated_at=timezone.now(),
+        )
+        if not touched:
+            ImageBlob.objects.get_or_create(
+                name=name, defaults={'size': size},
+            )
+
+    def iter_hashed_files(self):
+        """Имена файлов хранилища, похожие на имена из хэша, и время
+        их изменения.
+        """
+        for directory, _, filenames in os.walk(self.location):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.location).replace(
+                    os.sep, '/'
+                )
+                if HASHED_NAME.match(name):
+                    yield name, os.path.getmtime(path)
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,76 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.cache import get_post_card_generation, post_card_key
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Выводит карточку поста из кэша, отрисовывая её только при промахе.
+
+    Карточка не зависит от того, кто смотрит страницу, поэтому одна
+    закэшированная копия подходит для всех лент.
+    """
+    # Поколение читаем из кэша один раз на отрисовку страницы
+    generation = context.render_context.get('post_card_generation')
+    if generation is None:
+        generation = get_post_card_generation()
+        context.render_context['post_card_generation'] = generation
+
+    key = post_card_key(post.pk, generation)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('includes/post_card.html', {'post': post})
+        cache.set(key, html, settings.BLOG_POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+# Порядок важен: браузер берёт первый поддерживаемый <source>
+PICTURE_SOURCE_TYPES = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+
+def build_srcset(variants, extension=None):
+    return ', '.join(
+        '{} {}x'.format(
+            default_storage.url(
+                variant['formats'][extension] if extension
+                else variant['name']
+            ),
+            variant['scale'],
+        )
+        for variant in variants
+    )
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, label):
+    """Картинка поста в размере `label` из BLOG_IMAGE_RENDITIONS.
+
+    Форматы AVIF и WebP предлагаются через <picture>, JPEG остаётся
+    запасным вариантом. Пока копии не построены, выводится оригинал.
+    """
+    renditions = post.image_renditions or {}
+    variants = renditions.get(label)
+    if not variants or renditions.get('source') != post.image.name:
+        return {'post': post, 'image': None}
+    sources = [
+        {'type': mime_type, 'srcset': build_srcset(variants, extension)}
+        for extension, mime_type in PICTURE_SOURCE_TYPES
+        if all(extension in variant.get('formats', {}) for variant in variants)
+    ]
+    return {
+        'post': post,
+        'image': {
+            'src': default_storage.url(variants[0]['name']),
+            'srcset': build_srcset(variants),
+            'sources': sources,
+            'width': variants[0]['width'],
+            'height': variants[0]['height'],
+        },
+    }
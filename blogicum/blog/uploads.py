@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, ValidationError
+from django.core.files.uploadhandler import (
+    SkipFile, TemporaryFileUploadHandler,
+)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+class GuardedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемые файлы во временный файл по частям, не держа их
+    в памяти, и обрывает приём слишком больших.
+
+    Запрос, который целиком больше допустимого, отклоняется ещё до
+    чтения тела (ответ 400). Отдельный файл больше
+    BLOG_IMAGE_MAX_UPLOAD_SIZE пропускается; ошибку для поля формы
+    оставляет в request.upload_errors, её выводит UploadErrorsMixin.
+    """
+
+    def handle_raw_input(self, input_data, meta, content_length, boundary,
+                         encoding=None):
+        limit = (
+            settings.BLOG_IMAGE_MAX_UPLOAD_SIZE
+            + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        )
+        if content_length > limit:
+            raise RequestDataTooBig(
+                'Тело запроса превышает допустимый размер загрузки.'
+            )
+
+    def new_file(self, *args, **kwargs):
+        self.received = 0
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        limit = settings.BLOG_IMAGE_MAX_UPLOAD_SIZE
+        if self.received > limit:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = {}
+            self.request.upload_errors[self.field_name] = (
+                f'Файл больше {filesizeformat(limit)}.'
+            )
+            raise SkipFile
+        return super().receive_data_chunk(raw_data, start)
+
+
+def validate_image_upload(value):
+    """Проверяет размер файла и картинки до её декодирования.
+
+    Image.open читает только заголовок, поэтому ширину и высоту можно
+    проверить, не распаковывая пиксели в память. Уже сохранённые
+    файлы не проверяются.
+    """
+    if getattr(value, '_committed', True):
+        return
+    max_size = settings.BLOG_IMAGE_MAX_UPLOAD_SIZE
+    if value.size > max_size:
+        raise ValidationError(
+            f'Файл больше {filesizeformat(max_size)}.', code='file_too_big',
+        )
+    position = value.tell()
+    try:
+        with Image.open(value) as image:
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось прочитать изображение.', code='invalid_image',
+        )
+    finally:
+        value.seek(position)
+    max_side = settings.BLOG_IMAGE_MAX_SIDE
+    if width > max_side or height > max_side:
+        raise ValidationError(
+            f'Изображение больше {max_side} пикселей по одной из сторон.',
+            code='image_too_large',
+        )
+    if width * height > settings.BLOG_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком много пикселей в изображении.', code='image_too_large',
+        )
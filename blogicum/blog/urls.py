@@ -1,6 +1,7 @@
-from django.urls import path
+from django.urls import path, re_path
+from django.views.generic import TemplateView
 
-from . import views
+from . import api, feeds, views
 
 app_name = "blog"
 
@@ -8,13 +9,67 @@ urlpatterns = [
     path('', views.PostListView.as_view(), name="index"),
     path("posts/", views.PostListView.as_view(), name="post_list"),
     path("posts/<int:id>/", views.PostDetailView.as_view(), name="post_detail"),
+    path("search/", views.SearchView.as_view(), name="search"),
     path("posts/create/", views.PostCreateView.as_view(), name="create_post"),
     path("posts/<int:pk>/edit/", views.PostUpdateView.as_view(), name="edit_post"),
     path("posts/<int:pk>/delete/", views.PostDeleteView.as_view(), name="delete_post"),
+    path(
+        "posts/<int:post_id>/comments/", views.CommentListView.as_view(),
+        name="post_comments",
+    ),
     path("posts/<int:post_id>/comment/", views.CommentCreateView.as_view(), name="add_comment"),
     path("posts/<int:post_id>/edit_comment/<int:comment_id>/", views.CommentUpdateView.as_view(), name="edit_comment"),
     path("posts/<int:post_id>/delete_comment/<int:comment_id>/", views.CommentDeleteView.as_view(), name="delete_comment"),
     path("profile/<str:username>/", views.ProfileListView.as_view(), name="profile"),
     path("profile/<str:username>/edit/", views.ProfileUpdateView.as_view(), name="edit_profile"),
     path("category/<slug:category_slug>/", views.CategoryListView.as_view(), name="category_posts"),
-]
\ No newline at end of file
+    path("feeds/rss/", feeds.PostFeed(), name="feed_rss"),
+    path("feeds/atom/", feeds.AtomPostFeed(), name="feed_atom"),
+    path(
+        "feeds/category/<slug:category_slug>/rss/", feeds.CategoryFeed(),
+        name="category_feed_rss",
+    ),
+    path(
+        "feeds/category/<slug:category_slug>/atom/",
+        feeds.AtomCategoryFeed(), name="category_feed_atom",
+    ),
+    path(
+        "feeds/profile/<str:username>/rss/", feeds.AuthorFeed(),
+        name="profile_feed_rss",
+    ),
+    path(
+        "feeds/profile/<str:username>/atom/", feeds.AtomAuthorFeed(),
+        name="profile_feed_atom",
+    ),
+    path("sitemap.xml", views.SitemapView.as_view(), name="sitemap"),
+    re_path(
+        r"^(?P<name>sitemap-[a-z]+-\d+)\.xml$", views.SitemapView.as_view(),
+        name="sitemap_section",
+    ),
+    path(
+        "robots.txt",
+        TemplateView.as_view(
+            template_name="robots.txt", content_type="text/plain",
+        ),
+        name="robots",
+    ),
+    path("metrics", views.MetricsView.as_view(), name="metrics"),
+    path("export/", views.ExportView.as_view(), name="export"),
+    path("api/posts/", api.PostListApiView.as_view(), name="api_posts"),
+    path(
+        "api/posts/<int:post_id>/", api.PostDetailApiView.as_view(),
+        name="api_post_detail",
+    ),
+    path(
+        "api/posts/<int:post_id>/comments/", api.CommentListApiView.as_view(),
+        name="api_post_comments",
+    ),
+    path(
+        "api/category/<slug:category_slug>/",
+        api.CategoryPostsApiView.as_view(), name="api_category_posts",
+    ),
+    path(
+        "api/profile/<str:username>/", api.AuthorPostsApiView.as_view(),
+        name="api_profile_posts",
+    ),
+]
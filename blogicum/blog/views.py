@@ -1,32 +1,72 @@
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, StreamingHttpResponse,
+)
+from django.views import View
 from django.core.exceptions import PermissionDenied
 from django.contrib import messages
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils.crypto import constant_time_compare
+from django.views.static import serve
 
 from .forms import PostForm, CommentForm, UserForm
+from .cache import author_tag, category_tag
+from .export import iter_ndjson, parse_bounds
+from .metrics import registry
+from .pagination import KeysetPaginator
+from .search import search_posts
+from .sitemaps import get_sitemap_root, refresh_sitemaps
+from .mixins import (
+    AnonymousPageCacheMixin, ConditionalGetMixin, CursorPaginationMixin,
+    PostListConditionalGetMixin, UploadErrorsMixin,
+)
 from .models import Post, Category, Location, Comment
 
 User = get_user_model()
 
-class PostListView(ListView):
+
+class PostListView(AnonymousPageCacheMixin, PostListConditionalGetMixin,
+                   CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
     context_object_name = 'post_list'
     paginate_by = 10
 
+    def get_page_cache_tags(self):
+        return ['feed']
+
+    def get_queryset(self):
+        return Post.objects.published().feed()
+
+
+class SearchView(CursorPaginationMixin, ListView):
+    """Полнотекстовый поиск по опубликованным постам."""
+
+    model = Post
+    template_name = 'blog/search.html'
+    paginate_by = 10
+    pagination_mode = 'cursor'
+    cursor_keys = ('search_rank', 'id')
+
     def get_queryset(self):
-        return Post.objects.filter(
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True,
-        ).order_by('-pub_date')
+        self.query = self.request.GET.get('q', '').strip()
+        return search_posts(
+            Post.objects.published().with_feed_relations(), self.query
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, UploadErrorsMixin, CreateView):
     model = Post
     form_class = PostForm
 
@@ -41,7 +81,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse('blog:profile', kwargs={'username': self.object.author.username})
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, UploadErrorsMixin, UpdateView):
     model = Post
     form_class = PostForm
 
@@ -70,15 +110,35 @@ class PostDeleteView(LoginRequiredMixin, DeleteView):
         return reverse('pages:index') 
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
 
     pk_url_kwarg = 'id'
 
+    def get_queryset(self):
+        return Post.objects.with_feed_relations()
+
+    def get_validator_data(self, context):
+        # updated_at поста меняется и при изменении его комментариев
+        post = self.object
+        moments = [
+            post.updated_at,
+            post.category and post.category.updated_at,
+            post.location and post.location.updated_at,
+        ]
+        parts = moments + [post.author and post.author.username]
+        return parts, max(filter(None, moments))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = self.object.comments.all()
+        # Первая страница комментариев; остальные догружаются
+        # через CommentListView
+        context['comments'] = KeysetPaginator(
+            self.object.comments.select_related('author'),
+            settings.BLOG_COMMENTS_PER_PAGE,
+            keys=('created_at', 'id'),
+        ).page()
         context['form'] = CommentForm()
         return context
     
@@ -86,22 +146,59 @@ class PostDetailView(DetailView):
         return reverse('blog:profile', kwargs={'username': self.object.author.username}) 
 
     
-class ProfileListView(ListView):
+class CommentListView(CursorPaginationMixin, ListView):
+    """HTML-фрагмент со следующей страницей комментариев к посту."""
+
+    model = Comment
+    template_name = 'includes/comment_list.html'
+    pagination_mode = 'cursor'
+    cursor_keys = ('created_at', 'id')
+
+    def get_paginate_by(self, queryset):
+        return settings.BLOG_COMMENTS_PER_PAGE
+
+    def get_queryset(self):
+        self.post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        return self.post.comments.select_related('author')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.post
+        context['comments'] = context['page_obj']
+        return context
+
+
+class ProfileListView(AnonymousPageCacheMixin, PostListConditionalGetMixin,
+                      CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/profile.html'
     context_object_name = 'post_list'
     paginate_by = 10
 
+    def get_page_cache_tags(self):
+        return [author_tag(self.kwargs['username'])]
+
+    def get_scheduled_posts(self):
+        return super().get_scheduled_posts().filter(
+            author__username=self.kwargs['username'])
+
     def get_queryset(self):
         # Сохраняем пользователя в атрибут класса, чтобы не искать его дважды
         self.author = get_object_or_404(User, username=self.kwargs['username'])
         queryset = Post.objects.filter(author=self.author)
 
+        # Автор видит в профиле и свои неопубликованные посты
         if self.request.user != self.author:
-            queryset = queryset.filter(pub_date__lte=timezone.now(), is_published=True)
+            queryset = queryset.published()
 
-        return queryset.order_by('-pub_date')
+        return queryset.feed()
     
+    def get_validator_data(self, context):
+        parts, last_modified = super().get_validator_data(context)
+        # Шапка профиля выводит данные самого пользователя
+        parts += [self.author.get_full_name(), self.author.is_staff]
+        return parts, last_modified
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Используем уже найденного автора
@@ -149,12 +246,20 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         return reverse('blog:profile', kwargs={'username': self.request.user.username})
 
 
-class CategoryListView(ListView):
+class CategoryListView(AnonymousPageCacheMixin, PostListConditionalGetMixin,
+                       CursorPaginationMixin, ListView):
     model = Category
     template_name = 'blog/category.html'
     context_object_name = 'category_list'
     paginate_by = 10
 
+    def get_page_cache_tags(self):
+        return [category_tag(self.kwargs['category_slug'])]
+
+    def get_scheduled_posts(self):
+        return super().get_scheduled_posts().filter(
+            category__slug=self.kwargs['category_slug'])
+
     def get_queryset(self):
         # 1. Сначала находим нужную категорию по slug
         self.category = get_object_or_404(
@@ -164,10 +269,12 @@ class CategoryListView(ListView):
         )
         # 2. Возвращаем только те посты, которые относятся к этой категории
         # и проходят фильтрацию по публикации
-        return self.category.posts.filter(
-            is_published=True,
-            pub_date__lte=timezone.now()
-        ).order_by('-pub_date')
+        return self.category.posts.published().feed()
+
+    def get_validator_data(self, context):
+        parts, last_modified = super().get_validator_data(context)
+        parts.append(self.category.updated_at)
+        return parts, last_modified
 
     def get_context_data(self, **kwargs):
         # Добавляем саму категорию в контекст, чтобы вывести её заголовок в шаблоне
@@ -185,16 +292,16 @@ class CommentCreateView(LoginRequiredMixin,CreateView):
 
     def form_valid(self, form):
         post = get_object_or_404(
-            Post,  
-            pk=self.kwargs.get('post_id'),
-            is_published=True,
-            pub_date__lte=timezone.now())
+            Post.objects.published(),
+            pk=self.kwargs.get('post_id'))
 
         form.instance.post = post
         form.instance.author = self.request.user
         form.instance.pub_date = timezone.now()
 
-        return super().form_valid(form)
+        # Комментарий и счётчик comment_count поста сохраняются вместе
+        with transaction.atomic():
+            return super().form_valid(form)
     
     def get_success_url(self):
         # Редирект на профиль
@@ -236,6 +343,71 @@ class CommentDeleteView(LoginRequiredMixin, DeleteView):
         if comment.author != request.user:
             raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(request, *args, **kwargs)
     
     def get_success_url(self):
-        return reverse('blog:post_detail', kwargs={'pk': self.object.post.pk}) 
\ No newline at end of file
+        return reverse('blog:post_detail', kwargs={'pk': self.object.post.pk}) 
+
+
+class ExportView(UserPassesTestMixin, View):
+    """Потоковая выгрузка блога в NDJSON для сотрудников.
+
+    Работает как команда export_blog. Параметры since и until — даты в
+    формате ISO 8601.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        try:
+            bounds = parse_bounds(
+                request.GET.get('since'), request.GET.get('until'),
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        response = StreamingHttpResponse(
+            iter_ndjson(**bounds), content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="blogicum.ndjson"'
+        )
+        return response
+
+
+class SitemapView(View):
+    """Отдаёт файлы карты сайта с диска.
+
+    Устаревшую карту (старше BLOG_SITEMAP_MAX_AGE) дособирает один
+    процесс под файловой блокировкой, остальные отдают прежние файлы.
+    """
+
+    def get(self, request, name='sitemap'):
+        refresh_sitemaps()
+        return serve(request, f'{name}.xml', document_root=get_sitemap_root())
+
+
+class MetricsView(UserPassesTestMixin, View):
+    """Метрики для Prometheus.
+
+    Доступны сотрудникам и по заголовку
+    `Authorization: Bearer <BLOG_METRICS_TOKEN>`.
+    """
+
+    raise_exception = True
+
+    def test_func(self):
+        token = settings.BLOG_METRICS_TOKEN
+        header = self.request.headers.get('Authorization', '')
+        if token and constant_time_compare(header, f'Bearer {token}'):
+            return True
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return HttpResponse(
+            registry.expose(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -69,6 +69,7 @@ INSTALLED_APPS = [
     
 
 MIDDLEWARE = [
+    'blog.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -112,6 +113,18 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# В продакшене с несколькими процессами нужен общий бэкенд
+# (Memcached или Redis), иначе сброс кэша виден только одному процессу.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -131,6 +144,51 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        # Строки JSON для разбора медленных запросов. Файл пишут все
+        # WSGI-процессы, поэтому ротацию делает logrotate снаружи,
+        # а WatchedFileHandler сам переоткрывает переименованный файл.
+        'slow_queries': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': BASE_DIR / 'slow_queries.jsonl',
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+        # Медленные HTTP-запросы из RequestTimingMiddleware, в том же
+        # формате строк JSON
+        'slow_requests': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': BASE_DIR / 'slow_requests.jsonl',
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'blog.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'blog.timing': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -157,3 +215,83 @@ STATICFILES_DIRS = [BASE_DIR / 'static',]
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Blog
+
+# Режим пагинации лент: 'offset' (номера страниц) или 'cursor'
+# (ссылки «новее/старше» без COUNT(*) и OFFSET).
+BLOG_PAGINATION_MODE = 'offset'
+
+# Кэш отрисованных карточек постов. Версию нужно увеличить при изменении
+# шаблона includes/post_card.html.
+BLOG_POST_CARD_CACHE_VERSION = 3
+BLOG_POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Кэш целых страниц лент для анонимных посетителей (в секундах). Страницы
+# сбрасываются при изменении данных и к выходу отложенных публикаций.
+# Значение 0 отключает кэш страниц.
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# RSS и Atom: число записей в ленте и время хранения готового XML
+# (сбрасывается при изменении постов, как и кэш страниц). 0 отключает кэш.
+BLOG_FEED_ITEMS = 20
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Карта сайта: файлы лежат в BLOG_SITEMAP_ROOT, в каждом не больше
+# BLOG_SITEMAP_LIMIT адресов. Карта старше BLOG_SITEMAP_MAX_AGE секунд
+# дособирается командой build_sitemaps или первым запросом, взявшим
+# файловую блокировку; остальные запросы отдают прежние файлы.
+# BLOG_SITE_URL — адрес сайта для абсолютных ссылок в файлах.
+BLOG_SITE_URL = 'http://127.0.0.1:8000'
+BLOG_SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+BLOG_SITEMAP_LIMIT = 50_000
+BLOG_SITEMAP_MAX_AGE = 60 * 60
+
+# Замеры запросов (blog.middleware.RequestTimingMiddleware): заголовок
+# Server-Timing и запись в лог 'blog.timing' для запросов дольше
+# BLOG_SLOW_REQUEST_MS миллисекунд. Заголовок видят все посетители и
+# по нему можно судить о запросах к БД, поэтому по умолчанию он
+# отдаётся только в режиме отладки.
+BLOG_SERVER_TIMING = DEBUG
+BLOG_SLOW_REQUEST_MS = 500
+
+# Метрики Prometheus на /metrics (см. blog/metrics.py). При нескольких
+# WSGI-процессах нужен общий каталог BLOG_METRICS_DIR: процессы сбрасывают
+# туда значения раз в BLOG_METRICS_FLUSH_INTERVAL секунд. Без токена
+# метрики видны только сотрудникам.
+BLOG_METRICS_ENABLED = True
+BLOG_METRICS_DIR = None
+BLOG_METRICS_FLUSH_INTERVAL = 5
+BLOG_METRICS_TOKEN = ''
+
+# Журнал медленных SQL-запросов с планом выполнения (blog/slow_queries.py):
+# запросы дольше BLOG_SLOW_QUERY_MS, из них в журнал попадает доля
+# BLOG_SLOW_QUERY_SAMPLE_RATE. None отключает журнал.
+BLOG_SLOW_QUERY_MS = 100
+BLOG_SLOW_QUERY_SAMPLE_RATE = 0.1
+
+# Сколько комментариев выводить на странице поста и догружать за раз.
+BLOG_COMMENTS_PER_PAGE = 20
+
+# Уменьшенные копии картинок постов: ширина в пикселях для каждого места
+# вывода; для экранов высокой плотности дополнительно строятся копии 2x.
+BLOG_IMAGE_RENDITIONS = {'card': 600, 'detail': 1100}
+BLOG_IMAGE_QUALITY = 85
+# Дополнительные форматы копий и качество сжатия для каждого; форматы,
+# которые не умеет записывать установленный Pillow, пропускаются.
+# Пустой словарь оставляет только JPEG.
+BLOG_IMAGE_EXTRA_FORMATS = {'avif': 60, 'webp': 80}
+# Копии строятся в пуле из BLOG_IMAGE_WORKERS процессов. Если в пуле уже
+# BLOG_IMAGE_MAX_PENDING заданий, пост остаётся в очереди до запуска
+# команды process_images.
+BLOG_IMAGE_WORKERS = 2
+BLOG_IMAGE_MAX_PENDING = 20
+
+# Загрузка картинок: файлы пишутся во временный файл по частям, слишком
+# большие отклоняются ещё во время приёма; размеры в пикселях
+# проверяются по заголовку, до декодирования.
+FILE_UPLOAD_HANDLERS = ['blog.uploads.GuardedUploadHandler']
+BLOG_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+BLOG_IMAGE_MAX_SIDE = 10000
+BLOG_IMAGE_MAX_PIXELS = 40_000_000
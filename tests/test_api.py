@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def api_posts(mixer: Mixer, user, published_category, published_location):
+    posts = mixer.cycle(25).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, image=None,
+    )
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=False)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                pub_date=timezone.now() + timezone.timedelta(days=1))
+    mixer.cycle(3).blend("blog.Comment", post=posts[0], author=user)
+    return posts
+
+
+def test_feed_paginates_published_posts(api_posts, unlogged_client):
+    first = unlogged_client.get("/api/posts/").json()
+    assert len(first["results"]) == 20
+    assert first["previous"] is None
+    second = unlogged_client.get(
+        "/api/posts/", {"cursor": first["next"]}).json()
+    ids = [post["id"] for post in first["results"] + second["results"]]
+    assert sorted(ids) == sorted(post.id for post in api_posts), (
+        "Убедитесь, что API выдаёт только опубликованные посты."
+    )
+    assert second["next"] is None
+    assert "text" not in first["results"][0]
+    assert first["results"][0]["url"] == f"/posts/{first['results'][0]['id']}/"
+
+
+def test_sparse_fields(api_posts, unlogged_client):
+    with CaptureQueriesContext(connection) as queries:
+        data = unlogged_client.get("/api/posts/", {"fields": "id,title"}).json()
+    assert set(data["results"][0]) == {"id", "title"}
+    sql = queries.captured_queries[-1]["sql"]
+    assert '"blog_post"."text"' not in sql
+    assert "auth_user" not in sql and "blog_location" not in sql
+    response = unlogged_client.get("/api/posts/", {"fields": "id,secret"})
+    assert response.status_code == 400
+
+
+def test_category_and_author_feeds(
+        api_posts, published_category, user, unlogged_client, user_client):
+    category = unlogged_client.get(
+        f"/api/category/{published_category.slug}/").json()
+    assert category["results"][0]["category"] == published_category.slug
+    anonymous = unlogged_client.get(f"/api/profile/{user.username}/")
+    assert len(anonymous.json()["results"]) == 20
+    own = user_client.get(f"/api/profile/{user.username}/", {"fields": "id"})
+    second = user_client.get(f"/api/profile/{user.username}/",
+                             {"fields": "id", "cursor": own.json()["next"]})
+    assert len(second.json()["results"]) == 7, (
+        "Автор должен видеть в API и свои неопубликованные посты."
+    )
+    assert unlogged_client.get("/api/category/missing/").status_code == 404
+
+
+def test_post_detail_with_comments_and_etag(api_posts, unlogged_client):
+    post = api_posts[0]
+    response = unlogged_client.get(f"/api/posts/{post.id}/")
+    data = response.json()
+    assert data["text"] == post.text
+    assert len(data["comments"]["results"]) == 3
+    etag = response["ETag"]
+    cached = unlogged_client.get(
+        f"/api/posts/{post.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert unlogged_client.get("/api/posts/0/").status_code == 404
+    assert unlogged_client.get(
+        f"/api/posts/{post.id}/comments/", {"cursor": "bad"}
+    ).status_code == 400
@@ -0,0 +1,57 @@
+import re
+
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENTS_PER_PAGE = 3
+
+
+@pytest.fixture
+def many_comments(mixer: Mixer, post_with_published_location, user):
+    return mixer.cycle(COMMENTS_PER_PAGE * 2 + 1).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+
+
+def comment_ids(content: str):
+    return [int(pk) for pk in re.findall(r'name="comment_(\d+)"', content)]
+
+
+def more_link(content: str) -> str:
+    match = re.search(r'href="([^"]+\?cursor=[\w-]+)"', content)
+    return match.group(1) if match else ""
+
+
+def test_comments_paginated(
+        settings, many_comments, post_with_published_location,
+        unlogged_client: Client):
+    settings.BLOG_COMMENTS_PER_PAGE = COMMENTS_PER_PAGE
+    response = unlogged_client.get(f"/posts/{post_with_published_location.id}/")
+    content = response.content.decode("utf-8")
+    seen = comment_ids(content)
+    assert len(seen) == COMMENTS_PER_PAGE, (
+        "Убедитесь, что на странице поста выводится только первая страница "
+        "комментариев."
+    )
+
+    link = more_link(content)
+    while link:
+        fragment = unlogged_client.get(link)
+        assert fragment.status_code == 200
+        content = fragment.content.decode("utf-8")
+        assert "<html" not in content
+        seen += comment_ids(content)
+        link = more_link(content)
+
+    assert sorted(seen) == sorted(comment.id for comment in many_comments)
+    assert len(set(seen)) == len(seen)
+
+
+def test_comments_fragment_bad_cursor(
+        post_with_published_location, unlogged_client: Client):
+    url = f"/posts/{post_with_published_location.id}/comments/?cursor=bad"
+    assert unlogged_client.get(url).status_code == 404
+    assert unlogged_client.get("/posts/0/comments/").status_code == 404
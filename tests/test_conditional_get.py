@@ -0,0 +1,38 @@
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_not_modified(
+        mixer: Mixer, user, post_with_published_location,
+        user_client: Client):
+    url = f"/posts/{post_with_published_location.id}/"
+    # Первый ответ выдаёт CSRF-cookie, которая входит в ETag
+    user_client.get(url)
+    response = user_client.get(url)
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+    assert "Cookie" in response["Vary"]
+
+    etag = response["ETag"]
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    mixer.blend("blog.Comment", post=post_with_published_location, author=user)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что новый комментарий меняет ETag страницы поста."
+    )
+
+
+@pytest.mark.parametrize("page_cache_timeout", [0, 600])
+def test_feed_not_modified(
+        settings, page_cache_timeout, mixer: Mixer, user, published_category,
+        post_with_published_location, unlogged_client: Client):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = page_cache_timeout
+    etag = unlogged_client.get("/")["ETag"]
+    assert unlogged_client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    mixer.blend("blog.Post", author=user, category=published_category)
+    assert unlogged_client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 200
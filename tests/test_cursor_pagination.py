@@ -0,0 +1,56 @@
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_cursor(content: str, label: str) -> str:
+    match = re.search(r'href="\?cursor=([\w-]+)">\s*' + label, content)
+    return match.group(1) if match else ""
+
+
+def page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_cursor_pagination(
+        settings, many_posts_with_published_locations,
+        unlogged_client: Client, django_assert_num_queries):
+    settings.BLOG_PAGINATION_MODE = "cursor"
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    first = unlogged_client.get("/")
+    first_ids = page_ids(first)
+    assert len(first_ids) == N_PER_PAGE
+    older = get_cursor(first.content.decode("utf-8"), "Старше")
+    assert older, "Убедитесь, что на первой странице есть ссылка на старые посты."
+
+    with django_assert_num_queries(1):
+        second = unlogged_client.get(f"/?cursor={older}")
+    second_ids = page_ids(second)
+    assert len(second_ids) == N_PER_PAGE
+    assert not set(first_ids) & set(second_ids)
+    content = second.content.decode("utf-8")
+    assert not get_cursor(content, "Старше")
+
+    newer = get_cursor(content, "<< Новее")
+    assert page_ids(unlogged_client.get(f"/?cursor={newer}")) == first_ids
+
+
+def test_invalid_cursor(settings, unlogged_client: Client):
+    settings.BLOG_PAGINATION_MODE = "cursor"
+    assert unlogged_client.get("/?cursor=garbage").status_code == 404
+
+
+def test_explain_feeds_covers_cursor_queries(
+        many_posts_with_published_locations):
+    output = StringIO()
+    call_command("explain_feeds", depth=1, stdout=output)
+    for name in ("blog:index", "blog:category_posts", "blog:profile"):
+        assert f"{name} (offset)" in output.getvalue()
+        assert f"{name} (cursor)" in output.getvalue()
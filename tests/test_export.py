@@ -0,0 +1,69 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blog_data(mixer: Mixer, user, published_category, published_location):
+    old, new = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+        pub_date=mixer.sequence(
+            timezone.now() - timezone.timedelta(days=30), timezone.now()),
+    )
+    mixer.blend("blog.Comment", post=old, author=user)
+    mixer.blend("blog.Comment", post=new, author=user)
+    return old, new
+
+
+def parse(lines):
+    return [json.loads(line) for line in lines.splitlines()]
+
+
+def test_export_command(blog_data):
+    old, new = blog_data
+    output = StringIO()
+    call_command("export_blog", stdout=output)
+    objects = parse(output.getvalue())
+    assert [obj["model"] for obj in objects] == [
+        "blog.category", "blog.location", "blog.post", "blog.post",
+        "blog.comment", "blog.comment",
+    ]
+    post = objects[2]
+    assert post["pk"] == old.pk
+    assert post["fields"]["title"] == old.title
+    assert post["fields"]["author"] == old.author_id
+
+    output = StringIO()
+    since = (timezone.now() - timezone.timedelta(days=1)).date().isoformat()
+    call_command("export_blog", since=since, stdout=output)
+    objects = parse(output.getvalue())
+    assert [obj["pk"] for obj in objects if obj["model"] == "blog.post"] == [
+        new.pk
+    ]
+    assert [
+        obj["fields"]["post"] for obj in objects
+        if obj["model"] == "blog.comment"
+    ] == [new.pk], "Комментарии должны выгружаться только к выбранным постам."
+
+
+def test_export_endpoint(blog_data, mixer: Mixer, user_client: Client):
+    assert user_client.get("/export/").status_code == 403
+    staff = mixer.blend("auth.User", is_staff=True)
+    client = Client()
+    client.force_login(staff)
+    response = client.get("/export/", {"until": "2000-01-01"})
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    body = b"".join(response.streaming_content).decode("utf-8")
+    assert {obj["model"] for obj in parse(body)} == {
+        "blog.category", "blog.location"
+    }
+    assert client.get("/export/", {"since": "вчера"}).status_code == 400
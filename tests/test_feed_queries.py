@@ -0,0 +1,47 @@
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_posts(
+        mixer: Mixer, user, published_locations, published_category):
+    posts = mixer.cycle(N_PER_PAGE).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+    for post in posts:
+        mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    return posts
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+
+
+def test_index_feed_queries(
+        commented_posts, unlogged_client: Client,
+        django_assert_num_queries):
+    with django_assert_num_queries(2):
+        response = unlogged_client.get("/")
+    assert response.status_code == 200
+    assert "Комментарии (2)" in response.content.decode("utf-8"), (
+        "Убедитесь, что на главной странице выводится число комментариев."
+    )
+
+
+def test_category_and_profile_feed_queries(
+        commented_posts, published_category, user, unlogged_client: Client,
+        django_assert_num_queries):
+    # По одному дополнительному запросу на поиск категории и автора.
+    with django_assert_num_queries(3):
+        unlogged_client.get(f"/category/{published_category.slug}/")
+    with django_assert_num_queries(3):
+        unlogged_client.get(f"/profile/{user.username}/")
@@ -0,0 +1,72 @@
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category, settings):
+    settings.BLOG_FEED_ITEMS = 5
+    posts = mixer.cycle(7).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                title="Черновик", is_published=False)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                title="Завтра",
+                pub_date=timezone.now() + timezone.timedelta(days=1))
+    return posts
+
+
+@pytest.mark.parametrize("url", [
+    "/feeds/rss/", "/feeds/atom/",
+    "/feeds/category/{category}/rss/", "/feeds/profile/{author}/atom/",
+])
+def test_feeds_show_published_posts(
+        url, feed_posts, published_category, user, unlogged_client: Client):
+    response = unlogged_client.get(
+        url.format(category=published_category.slug, author=user.username))
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert content.count("<item>") + content.count("<entry>") == 5, (
+        "Убедитесь, что число записей в ленте ограничено BLOG_FEED_ITEMS."
+    )
+    assert "Черновик" not in content and "Завтра" not in content
+
+
+def test_feed_cached_and_conditional(
+        feed_posts, unlogged_client: Client, django_assert_num_queries):
+    first = unlogged_client.get("/feeds/rss/")
+    assert first["ETag"] and first["Last-Modified"]
+    with django_assert_num_queries(0):
+        again = unlogged_client.get("/feeds/rss/")
+    assert again.content == first.content
+    with django_assert_num_queries(0):
+        not_modified = unlogged_client.get(
+            "/feeds/rss/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert not_modified.status_code == 304
+
+    post = feed_posts[-1]
+    post.title = "Новый заголовок"
+    post.save()
+    assert "Новый заголовок" in unlogged_client.get(
+        "/feeds/rss/").content.decode("utf-8"), (
+        "Кэш ленты должен сбрасываться при изменении поста."
+    )
+
+
+def test_feed_for_unknown_category(unlogged_client: Client):
+    assert unlogged_client.get(
+        "/feeds/category/missing/rss/").status_code == 404
+
+
+def test_feed_cache_separated_by_host(
+        feed_posts, settings, unlogged_client: Client):
+    settings.ALLOWED_HOSTS = ["*"]
+    unlogged_client.get("/feeds/rss/", HTTP_HOST="first.example")
+    content = unlogged_client.get(
+        "/feeds/rss/", HTTP_HOST="second.example", secure=True,
+    ).content.decode("utf-8")
+    assert "https://second.example/" in content
+    assert "first.example" not in content
@@ -0,0 +1,107 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import needs_renditions, update_renditions
+from blog.models import ImageStatus, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_image(name="photo.png", size=(1600, 800)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+@pytest.fixture
+def post_with_image(settings, tmp_path, mixer, user, published_category):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=make_image(),
+    )
+
+
+def test_renditions_built(post_with_image, unlogged_client):
+    post = post_with_image
+    assert needs_renditions(post)
+    response = unlogged_client.get(f"/posts/{post.id}/")
+    assert "srcset" not in response.content.decode("utf-8"), (
+        "Пока копии не построены, должен выводиться оригинал."
+    )
+
+    update_renditions(post)
+    post.refresh_from_db()
+    assert not needs_renditions(post)
+    widths = [variant["width"] for variant in post.image_renditions["detail"]]
+    # Копия 2x не может быть шире оригинала
+    assert widths == [1100, 1600]
+
+    card = unlogged_client.get("/").content.decode("utf-8")
+    assert 'width="600" height="300"' in card
+    assert "_card_1200w.jpg 2x" in card
+    detail = unlogged_client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert "_detail_1100w.jpg 1x" in detail
+
+
+def test_regenerate_renditions_command(post_with_image):
+    call_command("regenerate_renditions")
+    post = Post.objects.get(pk=post_with_image.pk)
+    assert not needs_renditions(post)
+
+    post.image = make_image("other.png", (300, 200))
+    post.save()
+    assert needs_renditions(post), (
+        "Копии старой картинки не должны использоваться для новой."
+    )
+    call_command("regenerate_renditions")
+    post.refresh_from_db()
+    assert [v["width"] for v in post.image_renditions["card"]] == [300]
+
+
+def test_process_images_command(post_with_image, unlogged_client):
+    post = post_with_image
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.PENDING, (
+        "Новая картинка должна ставиться в очередь на обработку."
+    )
+    call_command("process_images", workers=1)
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.READY
+    assert not needs_renditions(post)
+    card = unlogged_client.get("/").content.decode("utf-8")
+    assert "_card_600w.jpg 1x" in card
+
+
+def test_modern_formats_without_exif(post_with_image, unlogged_client):
+    # Снимок 200x100, повёрнутый камерой: Orientation = 6 (90° по часовой)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    buffer = BytesIO()
+    Image.new("RGB", (200, 100), "teal").save(buffer, "JPEG", exif=exif)
+    post = post_with_image
+    post.image = SimpleUploadedFile("rotated.jpg", buffer.getvalue())
+    post.save()
+    update_renditions(post)
+
+    card = post.image_renditions["card"][0]
+    assert (card["width"], card["height"]) == (100, 200), (
+        "Поворот из EXIF должен применяться к копиям."
+    )
+    assert set(card["formats"]) == {"avif", "webp"}
+    for name in [card["name"], *card["formats"].values()]:
+        with default_storage.open(name) as rendition:
+            assert not Image.open(rendition).getexif(), (
+                "Метаданные EXIF не должны попадать в копии."
+            )
+
+    html = unlogged_client.get("/").content.decode("utf-8")
+    assert '<source type="image/avif"' in html
+    assert html.index("image/avif") < html.index("image/webp")
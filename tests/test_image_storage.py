@@ -0,0 +1,100 @@
+import pytest
+from django.core.management import call_command
+
+from blog.images import update_renditions
+from blog.models import ImageBlob, ImageStatus
+from blog.storage import image_storage
+from test_image_renditions import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blend_post(settings, tmp_path, mixer, user, published_category):
+    settings.MEDIA_ROOT = tmp_path
+
+    def blend(**kwargs):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, **kwargs
+        )
+    return blend
+
+
+def test_identical_uploads_share_blob(blend_post):
+    first = blend_post(image=make_image("a.PNG"))
+    second = blend_post(image=make_image("b.png"))
+    assert first.image.name == second.image.name, (
+        "Одинаковые файлы должны храниться один раз."
+    )
+    directory, filename = first.image.name.rsplit("/", 1)
+    assert directory == f"birthday/{filename[:2]}/{filename[2:4]}"
+    assert filename.endswith(".png")
+    assert ImageBlob.objects.get(name=first.image.name).ref_count == 2
+
+    other = blend_post(image=make_image("c.png", (10, 10)))
+    assert other.image.name != first.image.name
+
+
+def test_duplicate_upload_reuses_renditions(blend_post):
+    first = blend_post(image=make_image())
+    update_renditions(first)
+    second = blend_post(image=make_image())
+    second.refresh_from_db()
+    assert second.image_status == ImageStatus.READY
+    assert second.image_renditions == first.image_renditions
+
+
+def test_gc_images(blend_post):
+    first = blend_post(image=make_image())
+    second = blend_post(image=make_image())
+    name = first.image.name
+    update_renditions(first)
+
+    first.delete()
+    call_command("gc_images", grace=0)
+    assert image_storage.exists(name), (
+        "Файл, на который ещё ссылается пост, удалять нельзя."
+    )
+
+    second.image = None
+    second.save()
+    assert ImageBlob.objects.get(name=name).ref_count == 0
+    call_command("gc_images", grace=60)
+    assert image_storage.exists(name)
+    call_command("gc_images", grace=0)
+    assert not image_storage.exists(name)
+    assert not ImageBlob.objects.filter(name=name).exists()
+    renditions = first.image_renditions["card"]
+    assert not image_storage.exists(renditions[0]["name"])
+
+
+def test_gc_images_recount(blend_post):
+    post = blend_post(image=make_image())
+    ImageBlob.objects.update(ref_count=0)
+    call_command("gc_images", grace=0, recount=True)
+    assert image_storage.exists(post.image.name)
+    assert ImageBlob.objects.get(name=post.image.name).ref_count == 1
+
+
+def test_upload_restores_collected_file(blend_post):
+    first = blend_post(image=make_image())
+    name = first.image.name
+    # Файл удалён сборщиком, пока шла повторная загрузка
+    image_storage.delete(name)
+    second = blend_post(image=make_image())
+    assert second.image.name == name
+    assert image_storage.exists(name)
+
+
+def test_gc_images_sweeps_untracked_files(blend_post):
+    post = blend_post(image=make_image())
+    orphan = blend_post(image=make_image("c.png", (10, 10)))
+    name = orphan.image.name
+    # Как после отката транзакции: файла нет ни в ImageBlob, ни в постах
+    orphan.delete()
+    ImageBlob.objects.filter(name=name).delete()
+    call_command("gc_images", grace=60)
+    assert image_storage.exists(name)
+    call_command("gc_images", grace=0)
+    assert not image_storage.exists(name)
+    assert image_storage.exists(post.image.name)
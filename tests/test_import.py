@@ -0,0 +1,76 @@
+import io
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.importer import iter_json_objects
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+LEGACY_FIXTURE = [
+    {"model": "blog.category", "pk": 10, "fields": {
+        "created_at": "2022-12-18T23:03:52.159Z", "is_published": True,
+        "title": "Здоровье", "slug": "health", "description": "Спорт"}},
+    {"model": "auth.user", "pk": 10, "fields": {
+        "username": "chekhov", "password": "!", "groups": [],
+        "user_permissions": [], "date_joined": "2022-12-18T22:57:29Z"}},
+    {"model": "blog.post", "pk": 10, "fields": {
+        "created_at": "2022-12-18T23:06:18.993Z", "is_published": True,
+        "title": "Обед", "text": "Обед у Морозовой.",
+        "pub_date": "1897-02-13T00:00:00Z", "author": 10, "category": 10,
+        "location": None}},
+    {"model": "admin.logentry", "pk": 1, "fields": {}},
+]
+
+
+def test_iter_json_objects_across_chunks():
+    objects = [{"pk": index, "text": "ё" * index} for index in range(50)]
+    array = json.dumps(objects, ensure_ascii=False, indent=2)
+    assert list(iter_json_objects(io.StringIO(array), chunk_size=7)) == objects
+    ndjson = "\n".join(json.dumps(obj) for obj in objects)
+    assert list(iter_json_objects(io.StringIO(ndjson), chunk_size=5)) == objects
+
+
+def test_import_legacy_fixture(tmp_path):
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps(LEGACY_FIXTURE), encoding="utf-8")
+    output = StringIO()
+    call_command("import_blog", str(path), stdout=output)
+    category = Category.objects.get(pk=10)
+    assert category.pub_date.year == 2022, (
+        "Поле created_at старых фикстур должно попадать в pub_date."
+    )
+    post = Post.objects.get(pk=10)
+    assert post.created_at.year == 2022 and post.author.username == "chekhov"
+    report = output.getvalue()
+    assert "blog.post: 1" in report and "объектов/с" in report
+
+
+def test_export_import_round_trip(
+        tmp_path, mixer: Mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.cycle(2).blend("blog.Comment", post=posts[0], author=user)
+    path = tmp_path / "blog.ndjson"
+    with open(path, "w", encoding="utf-8") as output:
+        call_command("export_blog", stdout=output)
+    expected = list(Post.objects.order_by("pk").values())
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+
+    call_command("import_blog", str(path), batch_size=2, stdout=StringIO())
+    assert list(Post.objects.order_by("pk").values()) == expected
+    assert Comment.objects.count() == 2
+    assert Post.objects.get(pk=posts[0].pk).comment_count == 2
+
+
+def test_import_rejects_dangling_references(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps(LEGACY_FIXTURE[2:3]), encoding="utf-8")
+    with pytest.raises(Exception):
+        call_command("import_blog", str(path), stdout=StringIO())
+    assert not Post.objects.exists()
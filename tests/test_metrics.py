@@ -0,0 +1,92 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from blog.metrics import REQUESTS, registry
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(settings):
+    settings.BLOG_METRICS_DIR = None
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.fixture
+def staff_client(mixer: Mixer):
+    client = Client()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    return client
+
+
+def test_metrics_protected(settings, user_client: Client, client: Client):
+    assert user_client.get("/metrics").status_code == 403
+    settings.BLOG_METRICS_TOKEN = "secret"
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 403
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+
+def test_metrics_by_view_name(staff_client: Client, unlogged_client: Client):
+    unlogged_client.get("/")
+    unlogged_client.get("/")
+    unlogged_client.get("/posts/100500/")
+    content = staff_client.get("/metrics").content.decode("utf-8")
+    assert (
+        'blog_http_requests_total{view="blog:index",method="GET",'
+        'status="200"} 2'
+    ) in content
+    assert (
+        'blog_http_requests_total{view="blog:post_detail",method="GET",'
+        'status="404"} 1'
+    ) in content
+    assert (
+        'blog_http_request_duration_seconds_count{view="blog:index"} 2'
+    ) in content
+    assert (
+        'blog_db_queries_per_request_bucket{view="blog:index",le="+Inf"} 2'
+    ) in content
+    assert "# TYPE blog_http_request_duration_seconds histogram" in content
+
+
+def test_metrics_aggregated_across_processes(
+        settings, tmp_path, staff_client: Client, unlogged_client: Client):
+    settings.BLOG_METRICS_DIR = tmp_path
+    # Файл другого процесса
+    (tmp_path / "metrics-1.json").write_text(json.dumps({
+        "blog_http_requests_total": [
+            [["blog:index", "GET", "200"], 5],
+        ],
+    }))
+    unlogged_client.get("/")
+    content = staff_client.get("/metrics").content.decode("utf-8")
+    assert (
+        'blog_http_requests_total{view="blog:index",method="GET",'
+        'status="200"} 6'
+    ) in content
+
+
+def test_metrics_flush_is_thread_safe(settings, tmp_path):
+    settings.BLOG_METRICS_DIR = tmp_path
+    settings.BLOG_METRICS_FLUSH_INTERVAL = 0
+
+    def work(_):
+        for _ in range(300):
+            registry.inc(REQUESTS, ("blog:index", "GET", 200))
+
+    with ThreadPoolExecutor(8) as pool:
+        # list() пробрасывает исключения из потоков
+        list(pool.map(work, range(8)))
+    assert (
+        'blog_http_requests_total{view="blog:index",method="GET",'
+        'status="200"} 2400'
+    ) in registry.expose()
+    assert not list(tmp_path.glob("*.tmp"))
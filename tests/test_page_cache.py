@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.views import PostListView
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_page_cache(
+        mixer: Mixer, user, published_category, post_with_published_location,
+        unlogged_client: Client, user_client: Client,
+        django_assert_num_queries):
+    unlogged_client.get("/")
+    with django_assert_num_queries(0):
+        cached = unlogged_client.get("/")
+    assert post_with_published_location.title in cached.content.decode()
+
+    new_post = mixer.blend(
+        "blog.Post", author=user, category=published_category)
+    assert new_post.title in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что кэш ленты сбрасывается при появлении нового поста."
+    )
+    profile_url = f"/profile/{user.username}/"
+    unlogged_client.get(profile_url)
+    new_post.delete()
+    assert new_post.title not in (
+        unlogged_client.get(profile_url).content.decode())
+
+
+def test_page_cache_bypassed_for_authenticated(
+        post_with_published_location, user_client: Client):
+    user_client.get("/")
+    response = user_client.get("/")
+    assert response.context is not None, (
+        "Убедитесь, что авторизованные пользователи не получают страницу "
+        "из кэша."
+    )
+
+
+def test_page_cache_expires_with_scheduled_post(
+        mixer: Mixer, user, published_category):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    view = PostListView()
+    assert 0 < view.get_page_cache_timeout() <= 30
+
+
+def test_publish_scheduled_warms_pages(
+        mixer: Mixer, user, published_category, unlogged_client: Client,
+        django_assert_num_queries):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() - timedelta(seconds=1),
+    )
+    call_command("publish_scheduled", lookback=60)
+    with django_assert_num_queries(0):
+        response = unlogged_client.get(f"/category/{published_category.slug}/")
+    assert post.title in response.content.decode()
+
+
+def test_user_changes_keep_unrelated_pages(
+        mixer: Mixer, user, post_with_published_location,
+        unlogged_client: Client, django_assert_num_queries):
+    unlogged_client.get("/")
+    mixer.blend("auth.User")
+    user.set_password("new-password")
+    user.save()
+    with django_assert_num_queries(0):
+        unlogged_client.get("/")
+
+    post_with_published_location.author.username = "renamed"
+    post_with_published_location.author.save()
+    assert "@renamed" in unlogged_client.get("/").content.decode(), (
+        "Переименование автора должно сбрасывать ленты с его постами."
+    )
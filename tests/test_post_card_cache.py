@@ -0,0 +1,50 @@
+import pytest
+from django.core.cache import cache
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from blog.cache import get_post_card_generation, post_card_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_card_cache_invalidation(
+        mixer: Mixer, user, post_with_published_location,
+        unlogged_client: Client):
+    post = post_with_published_location
+    assert "Комментарии (0)" in unlogged_client.get("/").content.decode()
+
+    mixer.blend("blog.Comment", post=post, author=user)
+    assert "Комментарии (1)" in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что карточка поста обновляется после комментария."
+    )
+
+    category = post.category
+    category.title = "Новое название категории"
+    category.save()
+    assert category.title in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что карточки обновляются после изменения категории."
+    )
+
+
+def test_author_changes_invalidate_only_their_cards(
+        mixer: Mixer, user, published_category):
+    own = mixer.blend("blog.Post", author=user, category=published_category)
+    other = mixer.blend("blog.Post", category=published_category)
+    generation = get_post_card_generation()
+    cache.set_many({
+        post_card_key(own.pk): "own", post_card_key(other.pk): "other",
+    })
+
+    mixer.blend("auth.User")
+    user.set_password("new-password")
+    user.save()
+    assert cache.get(post_card_key(own.pk)) == "own", (
+        "Регистрация и смена пароля не должны сбрасывать карточки."
+    )
+
+    user.username = "renamed"
+    user.save()
+    assert get_post_card_generation() == generation
+    assert cache.get(post_card_key(own.pk)) is None
+    assert cache.get(post_card_key(other.pk)) == "other"
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post, SearchIndexState
+
+pytestmark = [pytest.mark.django_db]
+
+
+def indexed_ids(query):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid FROM blog_post_fts WHERE blog_post_fts MATCH %s "
+            "ORDER BY rowid", [query])
+        return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def posts(mixer: Mixer, user, published_category):
+    return mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Закат", text="Море",
+    )
+
+
+def test_full_rebuild_resumes(posts):
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM blog_post_fts")
+    # Прерванная на втором посте перестройка
+    SearchIndexState.objects.create(
+        last_pk=posts[1].pk, rebuild_started_at=posts[0].created_at)
+    call_command("rebuild_search_index", batch_size=2)
+    assert indexed_ids("закат") == [post.pk for post in posts[2:]]
+
+    call_command("rebuild_search_index", batch_size=2, restart=True)
+    assert indexed_ids("закат") == [post.pk for post in posts]
+    state = SearchIndexState.objects.get()
+    assert state.last_pk == 0 and state.watermark is not None
+
+
+def test_incremental_rebuild(posts):
+    call_command("rebuild_search_index")
+    # Изменения в обход триггеров: как при массовом импорте
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM blog_post_fts WHERE rowid = %s",
+                       [posts[0].pk])
+        cursor.execute("INSERT INTO blog_post_fts (rowid, title, text) "
+                       "VALUES (100500, 'закат', '')")
+    Post.objects.filter(pk=posts[0].pk).update(
+        title="Рассвет", updated_at=timezone.now())
+    call_command("rebuild_search_index", incremental=True, batch_size=2)
+    assert indexed_ids("рассвет") == [posts[0].pk]
+    # Сиротские строки инкрементальный проход не ищет — только --prune
+    assert indexed_ids("закат")[-1] == 100500
+    call_command("rebuild_search_index", incremental=True, prune=True)
+    assert indexed_ids("закат") == [post.pk for post in posts[1:]]
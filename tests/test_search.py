@@ -0,0 +1,73 @@
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_posts(mixer: Mixer, user, published_category):
+    return {
+        "visible": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Поход в горы", text="Палатка, котелок и горные тропы.",
+        ),
+        "hidden": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Черновик про горы", text="Горы", is_published=False,
+        ),
+        "future": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Горы завтра", text="Горы",
+            pub_date=timezone.now() + timezone.timedelta(days=1),
+        ),
+        "other": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Рецепт пирога", text="Мука и яблоки.",
+        ),
+    }
+
+
+def found_ids(client: Client, query: str):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_respects_visibility(searchable_posts, unlogged_client):
+    assert found_ids(unlogged_client, "горы") == [
+        searchable_posts["visible"].id
+    ], "Убедитесь, что поиск находит только опубликованные посты."
+    assert found_ids(unlogged_client, "пиро") == [searchable_posts["other"].id]
+    assert found_ids(unlogged_client, "") == []
+    assert found_ids(unlogged_client, '"*) OR (') == []
+
+
+def test_search_index_follows_changes(searchable_posts, unlogged_client):
+    post = searchable_posts["other"]
+    post.title = "Рецепт штруделя"
+    post.save()
+    assert found_ids(unlogged_client, "штрудель") == []
+    assert found_ids(unlogged_client, "штруделя") == [post.id]
+    assert found_ids(unlogged_client, "пирога") == []
+    post.delete()
+    assert found_ids(unlogged_client, "штруделя") == []
+
+
+def test_search_paginates_with_query(
+        mixer: Mixer, user, published_category, unlogged_client):
+    posts = mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Заметка", text=mixer.sequence(*(["море " * n for n in range(1, 13)])),
+    )
+    first = unlogged_client.get("/search/", {"q": "море"})
+    content = first.content.decode("utf-8")
+    assert "?q=%D0%BC%D0%BE%D1%80%D0%B5&amp;cursor=" in content, (
+        "Убедитесь, что ссылки на следующие страницы поиска сохраняют запрос."
+    )
+    next_url = first.context["page_obj"].next_cursor
+    second = unlogged_client.get("/search/", {"q": "море", "cursor": next_url})
+    ids = [post.id for post in first.context["page_obj"]]
+    ids += [post.id for post in second.context["page_obj"]]
+    assert sorted(ids) == sorted(post.id for post in posts)
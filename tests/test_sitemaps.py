@@ -0,0 +1,129 @@
+import os
+import re
+
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.sitemaps import MANIFEST_NAME, build_lock, build_sitemaps
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def sitemap_settings(settings, tmp_path):
+    settings.BLOG_SITEMAP_ROOT = tmp_path
+    settings.BLOG_SITEMAP_LIMIT = 3
+    settings.BLOG_SITE_URL = "http://testserver"
+    return tmp_path
+
+
+@pytest.fixture
+def posts(mixer: Mixer, user, published_category):
+    posts = mixer.cycle(7).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=False)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                pub_date=timezone.now() + timezone.timedelta(days=1))
+    return posts
+
+
+def post_locations(root):
+    locations = []
+    for path in sorted(root.glob("sitemap-posts-*.xml")):
+        locations += re.findall(r"/posts/(\d+)/</loc>", path.read_text())
+    return sorted(int(pk) for pk in locations)
+
+
+def test_sitemap_split_into_index(
+        posts, user, published_category, sitemap_settings):
+    build_sitemaps()
+    index = (sitemap_settings / "sitemap.xml").read_text()
+    assert index.count("<sitemap>") == 5, (
+        "7 постов при лимите 3 — три файла, плюс категории и профили."
+    )
+    assert post_locations(sitemap_settings) == [post.pk for post in posts]
+    categories = next(sitemap_settings.glob("sitemap-categories-*.xml"))
+    assert f"/category/{published_category.slug}/" in categories.read_text()
+    profiles = next(sitemap_settings.glob("sitemap-profiles-*.xml"))
+    assert f"/profile/{user.username}/" in profiles.read_text()
+
+
+def test_sitemap_lastmod_from_updated_at(posts, sitemap_settings):
+    moment = timezone.now() + timezone.timedelta(hours=1)
+    Post.objects.filter(pk=posts[0].pk).update(updated_at=moment)
+    build_sitemaps()
+    content = (sitemap_settings / f"sitemap-posts-{posts[0].pk}.xml").read_text()
+    lastmod = moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+    assert f"/posts/{posts[0].pk}/</loc><lastmod>{lastmod}</lastmod>" in content
+
+
+def test_sitemap_rebuilt_incrementally(
+        posts, mixer: Mixer, user, published_category, sitemap_settings):
+    build_sitemaps()
+    assert build_sitemaps() == [], (
+        "Неизменившиеся файлы не должны переписываться."
+    )
+
+    # Дата изменения поста сдвигает и lastmod его категории и автора
+    others = {
+        f"sitemap-categories-{published_category.pk}.xml",
+        f"sitemap-profiles-{user.pk}.xml",
+    }
+    Post.objects.filter(pk=posts[4].pk).update(
+        updated_at=timezone.now() + timezone.timedelta(hours=1))
+    assert set(build_sitemaps()) == {
+        f"sitemap-posts-{posts[3].pk}.xml", *others}
+
+    new_post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timezone.timedelta(hours=2))
+    Post.objects.filter(pk=new_post.pk).update(pub_date=timezone.now())
+    assert set(build_sitemaps()) == {f"sitemap-posts-{posts[6].pk}.xml"}
+    assert post_locations(sitemap_settings) == [
+        post.pk for post in posts] + [new_post.pk]
+
+    Post.objects.filter(pk__in=[posts[0].pk, posts[1].pk]).delete()
+    assert build_sitemaps() == [f"sitemap-posts-{posts[2].pk}.xml"]
+    assert not (sitemap_settings / f"sitemap-posts-{posts[0].pk}.xml").exists()
+    assert post_locations(sitemap_settings) == [
+        post.pk for post in posts[2:]] + [new_post.pk]
+
+
+def test_sitemap_view(posts, unlogged_client: Client):
+    response = unlogged_client.get("/sitemap.xml")
+    assert response.status_code == 200
+    content = b"".join(response.streaming_content).decode("utf-8")
+    location = re.search(
+        r"<loc>http://testserver(/sitemap-posts-\d+\.xml)</loc>", content)
+    assert unlogged_client.get(location.group(1)).status_code == 200
+    assert unlogged_client.get("/sitemap-posts-0.xml").status_code == 404
+    robots = unlogged_client.get("/robots.txt").content.decode("utf-8")
+    assert "Sitemap: http://testserver/sitemap.xml" in robots
+
+
+def test_stale_sitemap_served_while_locked(
+        posts, mixer: Mixer, user, published_category, sitemap_settings,
+        unlogged_client: Client):
+    build_sitemaps()
+    index = (sitemap_settings / "sitemap.xml").read_text()
+    stale = timezone.now().timestamp() - 2 * 60 * 60
+    os.utime(sitemap_settings / MANIFEST_NAME, (stale, stale))
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category)
+
+    # Карту собирает другой процесс: запрос не ждёт и отдаёт прежнюю
+    with build_lock() as acquired:
+        assert acquired
+        response = unlogged_client.get("/sitemap.xml")
+        content = b"".join(response.streaming_content).decode("utf-8")
+    assert content == index
+
+    response = unlogged_client.get("/sitemap.xml")
+    content = b"".join(response.streaming_content).decode("utf-8")
+    assert content.count("<sitemap>") == index.count("<sitemap>") + 1, (
+        "Без чужой блокировки устаревшая карта дособирается."
+    )
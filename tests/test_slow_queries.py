@@ -0,0 +1,58 @@
+import json
+import logging
+
+import pytest
+from django.db import connection, transaction
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.slow_queries import explain, logger
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def slow_query_log(settings, caplog, monkeypatch):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    settings.BLOG_SLOW_QUERY_MS = 0
+    settings.BLOG_SLOW_QUERY_SAMPLE_RATE = 1
+    # Вместо файла из LOGGING — в caplog
+    monkeypatch.setattr(logger, "handlers", [caplog.handler])
+    caplog.set_level(logging.INFO, logger="blog.slow_queries")
+    return caplog
+
+
+def records(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records]
+
+
+def test_slow_queries_logged_with_plan(
+        slow_query_log, mixer: Mixer, user, published_category,
+        unlogged_client: Client):
+    mixer.blend("blog.Post", author=user, category=published_category)
+    unlogged_client.get("/")
+    logged = records(slow_query_log)
+    assert len(logged) == 2, "Главная страница выполняет два запроса."
+    for record in logged:
+        assert record["view"] == "blog:index"
+        assert record["sql"].startswith("SELECT")
+        assert record["plan"] and isinstance(record["plan"], list)
+    assert any("blog_post" in line for line in logged[-1]["plan"])
+
+
+def test_slow_queries_sampled(
+        slow_query_log, settings, unlogged_client: Client):
+    settings.BLOG_SLOW_QUERY_SAMPLE_RATE = 0
+    unlogged_client.get("/")
+    settings.BLOG_SLOW_QUERY_SAMPLE_RATE = 1
+    settings.BLOG_SLOW_QUERY_MS = None
+    unlogged_client.get("/")
+    assert not slow_query_log.records
+
+
+def test_failed_explain_keeps_transaction():
+    with transaction.atomic():
+        plan = explain(connection, "SELECT * FROM missing_table", ())
+        assert plan[0].startswith("EXPLAIN не выполнен")
+        assert Post.objects.count() == 0
@@ -0,0 +1,61 @@
+import json
+import logging
+import re
+
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from blog.middleware import logger
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture
+def timing_log(caplog, monkeypatch):
+    # Вместо файла из LOGGING — в caplog
+    monkeypatch.setattr(logger, "handlers", [caplog.handler])
+    caplog.set_level(logging.WARNING, logger="blog.timing")
+    return caplog
+
+
+def test_server_timing_header(
+        settings, mixer: Mixer, user, published_category,
+        unlogged_client: Client):
+    settings.BLOG_SERVER_TIMING = True
+    mixer.cycle(3).blend("blog.Post", author=user, category=published_category)
+    response = unlogged_client.get("/")
+    timing = response["Server-Timing"]
+    assert 'desc="2 queries"' in timing
+    render = re.search(r"tpl;dur=([\d.]+)", timing)
+    assert render and float(render.group(1)) > 0, (
+        "Убедитесь, что в Server-Timing попадает время отрисовки шаблона."
+    )
+
+
+def test_slow_request_logged(
+        settings, timing_log, unlogged_client: Client):
+    settings.BLOG_SLOW_REQUEST_MS = 0
+    response = unlogged_client.get("/")
+    record, = timing_log.records
+    assert record.timing["view"] == "blog:index"
+    assert record.timing["status"] == 200
+    assert record.timing["bytes"] == len(response.content)
+    assert json.loads(record.getMessage()) == record.timing
+
+
+def test_server_timing_disabled(settings, unlogged_client: Client):
+    settings.BLOG_SERVER_TIMING = False
+    assert not unlogged_client.get("/").has_header("Server-Timing")
+
+
+def test_fast_request_not_logged(
+        settings, timing_log, unlogged_client: Client):
+    settings.BLOG_SLOW_REQUEST_MS = 60 * 1000
+    unlogged_client.get("/")
+    assert not timing_log.records
@@ -0,0 +1,63 @@
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+from test_image_renditions import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_data(settings, tmp_path, published_category):
+    settings.MEDIA_ROOT = tmp_path
+    return {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
+        "category": published_category.id,
+        "is_published": True,
+    }
+
+
+def test_valid_upload_accepted(post_data, user_client):
+    post_data["image"] = make_image(size=(300, 200))
+    response = user_client.post("/posts/create/", post_data)
+    assert response.status_code == 302
+    assert Post.objects.get().image
+
+
+def test_oversized_file_rejected(settings, post_data, user_client):
+    settings.BLOG_IMAGE_MAX_UPLOAD_SIZE = 1024
+    # Корректная картинка, дополненная мусором до размера больше лимита
+    image = make_image(size=(300, 200))
+    image.file.seek(0, 2)
+    image.file.write(b"\0" * 2048)
+    image.file.seek(0)
+    post_data["image"] = image
+    response = user_client.post("/posts/create/", post_data)
+    assert response.status_code == 200
+    assert response.context["form"].errors["image"][0].startswith(
+        "Файл больше"
+    ), (
+        "Убедитесь, что слишком большой файл отклоняется с ошибкой в форме."
+    )
+    assert not Post.objects.exists()
+
+
+def test_oversized_request_rejected(settings, post_data, user_client):
+    settings.BLOG_IMAGE_MAX_UPLOAD_SIZE = 1024
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 1024
+    post_data["image"] = make_image(size=(300, 200))
+    post_data["text"] = "Текст" * 1000
+    response = user_client.post("/posts/create/", post_data)
+    assert response.status_code == 400
+    assert not Post.objects.exists()
+
+
+def test_image_dimensions_checked(settings, post_data, user_client):
+    settings.BLOG_IMAGE_MAX_SIDE = 250
+    post_data["image"] = make_image(size=(300, 200))
+    response = user_client.post("/posts/create/", post_data)
+    assert response.status_code == 200
+    assert "image" in response.context["form"].errors
+    assert not Post.objects.exists()